@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Dashboard statistics benchmark on a file-backed SQLite database.
+
+Fills a database with --rows transactions spread over --days days (merchant
+names drawn with the skewed distribution of bench_rule_matching.py, three
+sources), then times GET /stats for the whole history, the last year and the
+last month:
+
+  separate  the four per-chart repository queries the endpoint used to run
+  single    TransactionRepository.get_dashboard_stats
+
+Pass --db to run against an existing database instead (it is upgraded first).
+
+Usage:
+    python benchmarks/bench_dashboard.py --rows 200000 --days 1095
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.migrations import refresh_statistics, upgrade_database
+from src.infrastructure.models import ParsedTransaction, SourceType, Transaction
+from src.infrastructure.repositories import TransactionRepository
+from bench_rule_matching import CATEGORIES, make_merchants, make_rules
+
+SOURCES = [("PayPay", SourceType.paypay), ("SMBC", SourceType.smbc), ("Manual", SourceType.manual)]
+
+
+def fill(session, rows: int, days: int):
+    rnd = random.Random(0)
+    merchants = make_merchants(make_rules(200), rows)
+    categories = {merchant: rnd.choice(CATEGORIES) for merchant in set(merchants)}
+    start = date.today() - timedelta(days=days)
+    records = []
+    for i, merchant in enumerate(merchants):
+        source, source_type = rnd.choice(SOURCES)
+        records.append(ParsedTransaction(
+            date=start + timedelta(days=rnd.randrange(days)),
+            amount=rnd.randint(100, 20000),
+            merchant=merchant,
+            description="",
+            source=source,
+            source_type=source_type,
+            record_hash=f"bench-{i}",
+            category=categories[merchant],
+        ))
+    TransactionRepository.bulk_create(session, records, batch_size=5000)
+
+
+def separate(session, start_date, end_date):
+    TransactionRepository.get_weekly_spending_by_category(session, start_date, end_date)
+    TransactionRepository.get_source_breakdown(session, start_date, end_date)
+    TransactionRepository.get_top_merchants(session, start_date=start_date, end_date=end_date)
+    TransactionRepository.get_category_spending(session, start_date, end_date)
+
+
+def single(session, start_date, end_date):
+    TransactionRepository.get_dashboard_stats(session, start_date, end_date)
+
+
+def best_of(repeat: int, fn, *args) -> float:
+    fn(*args)  # warm the page cache
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(session, repeat: int):
+    rows = session.query(func.count(Transaction.id)).scalar()
+    last = session.query(func.max(Transaction.date)).scalar()
+    print(f"Dashboard stats over {rows:,} transactions (best of {repeat})")
+    ranges = [
+        ("all", None, None),
+        ("last year", last - timedelta(days=365), last),
+        ("last month", last - timedelta(days=30), last),
+    ]
+    for label, start_date, end_date in ranges:
+        timings = [best_of(repeat, fn, session, start_date, end_date) for fn in (separate, single)]
+        print(f"  {label:<11} separate {timings[0] * 1000:8.1f} ms  single {timings[1] * 1000:8.1f} ms"
+              f"  ({timings[0] / timings[1]:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000, help="transactions in the generated database")
+    parser.add_argument("--days", type=int, default=1095, help="days of history the transactions span")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement")
+    parser.add_argument("--db", help="benchmark this existing SQLite database instead")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.db or os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        upgrade_database(engine)
+        session = sessionmaker(bind=engine)()
+        if not args.db:
+            fill(session, args.rows, args.days)
+            # As the next start-up of the app would
+            with engine.begin() as conn:
+                refresh_statistics(conn)
+            TransactionRepository.build_month_snapshots(session)
+        run(session, args.repeat)
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
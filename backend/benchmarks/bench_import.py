@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Persistence benchmark for imports on a file-backed SQLite database.
+
+Parses a synthetic PayPay statement once, then times writing it with the
+per-row TransactionRepository.create() (add/commit/refresh per row) and with
+TransactionRepository.bulk_create(). The databases get the app's schema from
+upgrade_database, indexes and triggers included, so the rates match production.
+
+Usage:
+    python benchmarks/bench_import.py --rows 20000 --batch-size 1000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Add the backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.migrations import upgrade_database
+from src.infrastructure.parsers import PayPayParser
+from src.infrastructure.repositories import TransactionRepository
+from bench_parsers import make_paypay_csv
+
+
+def fresh_session(directory: str, name: str):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}")
+    # The app's full schema, with the search and rollup triggers an import has to maintain
+    upgrade_database(engine)
+    return sessionmaker(bind=engine)()
+
+
+def per_row(session, transactions, batch_size):
+    for t in transactions:
+        TransactionRepository.create(session, t)
+
+
+def bulk(session, transactions, batch_size):
+    TransactionRepository.bulk_create(session, transactions, batch_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="rows in the synthetic statement")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per INSERT/commit for bulk_create")
+    args = parser.parse_args()
+
+    content = make_paypay_csv(args.rows)
+    print(f"Persisting PayPay statement ({args.rows:,} rows before filtering) to file-backed SQLite")
+
+    rates = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for label, write in [("per-row", per_row), ("bulk", bulk)]:
+            transactions = PayPayParser().parse(content, "bench.csv")
+            session = fresh_session(directory, f"{label}.db")
+            start = time.perf_counter()
+            write(session, transactions, args.batch_size)
+            elapsed = time.perf_counter() - start
+            session.close()
+            rates[label] = len(transactions) / elapsed
+            print(f"  {label:<8} {elapsed * 1000:10.1f} ms  {rates[label]:12,.0f} rows/sec")
+
+    print(f"  speedup  {rates['bulk'] / rates['per-row']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
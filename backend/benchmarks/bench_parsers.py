@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the CSV parsers.
+
+Generates a synthetic statement, parses it with the current parser and with
+the original row-by-row (iterrows) implementation, and prints rows/sec for both.
+
+Usage:
+    python benchmarks/bench_parsers.py --rows 100000 --repeat 3
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Add the backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.models import SourceType, Transaction
+from src.infrastructure.parsers import PayPayParser, SMBCParser
+
+MERCHANTS = [
+    "スターバックス銀座店", "マクドナルド新宿店", "セブン-イレブン渋谷店",
+    "ローソン原宿店", "FamilyMart池袋店", "ＡＭ　ＰＭ　タワーマンション店",
+    "イオン銀座店", "ドトールコーヒー銀座", "Amazon.co.jp", "JR東日本",
+]
+
+PAYPAY_HEADER = [
+    "Date & Time", "Amount Outgoing (Yen)", "Amount Incoming (Yen)",
+    "Amount Outgoing Overseas", "Currency", "Exchange Rate (Yen)",
+    "Country Paid In", "Transaction Type", "Business Name", "Method",
+    "Payment Option", "User", "Transaction ID",
+]
+
+
+def make_paypay_csv(rows: int, seed: int = 0) -> bytes:
+    """Build a PayPay export with a realistic mix of payments, refunds and top-ups."""
+    rnd = random.Random(seed)
+    base = datetime(2023, 1, 1)
+    lines = [",".join(PAYPAY_HEADER)]
+    for i in range(rows):
+        dt = (base + timedelta(minutes=17 * i)).strftime("%Y/%m/%d %H:%M:%S")
+        kind = rnd.choices(["Payment", "Refund", "Top-Up"], weights=[85, 5, 10])[0]
+        amount = f'"{rnd.randint(100, 250000):,}"'
+        outgoing, incoming = (amount, "-") if kind == "Payment" else ("-", amount)
+        merchant = "PayPay" if kind == "Top-Up" else rnd.choice(MERCHANTS)
+        lines.append(",".join([
+            dt, outgoing, incoming, "-", "-", "-", "-", kind, merchant,
+            "PayPay Balance", "-", "-", f"{21281100000000000000 + i}",
+        ]))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def make_smbc_csv(rows: int, seed: int = 0) -> bytes:
+    """Build an SMBC card statement (CP932, card header line, no column header)."""
+    rnd = random.Random(seed)
+    base = datetime(2023, 1, 1)
+    lines = ["山田　太郎,4980-00**-****-****,Ｏｌｉｖｅゴールド"]
+    for i in range(rows):
+        day = (base + timedelta(hours=5 * i)).strftime("%Y/%m/%d")
+        amount = rnd.randint(100, 80000)
+        lines.append(f"{day},{rnd.choice(MERCHANTS)},{amount},１,１,{amount},")
+    return ("\r\n".join(lines) + "\r\n").encode("cp932")
+
+
+def iterrows_paypay(file_content: bytes) -> list:
+    """The original row-by-row PayPay parse loop, kept as the 'before' baseline."""
+    df = pd.read_csv(io.BytesIO(file_content), encoding='utf-8', dtype=str)
+    rows = []
+    for _, row in df.iterrows():
+        if pd.isna(row.get('Transaction ID')):
+            continue
+        if row.get('Transaction Type', '') not in ['Payment', 'Refund']:
+            continue
+        try:
+            date_obj = datetime.strptime(row['Date & Time'], '%Y/%m/%d %H:%M:%S').date()
+        except ValueError:
+            continue
+        amount = 0
+        outgoing = row.get('Amount Outgoing (Yen)', '-')
+        incoming = row.get('Amount Incoming (Yen)', '-')
+        if outgoing != '-':
+            amount = int(str(outgoing).replace(',', ''))
+        elif incoming != '-':
+            amount = -1 * int(str(incoming).replace(',', ''))
+        rows.append(Transaction(
+            date=date_obj,
+            amount=amount,
+            merchant=row.get('Business Name', ''),
+            description=row.get('Transaction Details', ''),
+            source=row.get('Method', 'PayPay'),
+            source_type=SourceType.paypay,
+            record_hash=str(row['Transaction ID']),
+            category="Uncategorized",
+        ))
+    return rows
+
+
+def iterrows_smbc(file_content: bytes) -> list:
+    """The original SMBC parse: decode twice, then iterrows/strptime/sha256 per row."""
+    text_io = io.TextIOWrapper(io.BytesIO(file_content), encoding='cp932')
+    header_row = next(csv.reader(io.StringIO(text_io.readline())))
+    source_name = f"{header_row[2]} ({header_row[1]})"
+    df = pd.read_csv(io.BytesIO(file_content), encoding='cp932', header=None, skiprows=1)
+    rows = []
+    for _, row in df.iterrows():
+        date_str = str(row[0])
+        merchant = str(row[1])
+        try:
+            date_obj = datetime.strptime(date_str, '%Y/%m/%d').date()
+        except ValueError:
+            continue
+        try:
+            amount = int(str(row[5]).replace(',', ''))
+        except ValueError:
+            amount = 0
+        record_hash = hashlib.sha256(f"{date_str}{merchant}{amount}".encode('utf-8')).hexdigest()
+        rows.append(Transaction(
+            date=date_obj,
+            amount=amount,
+            merchant=merchant,
+            description="Credit Card Payment",
+            source=source_name,
+            source_type=SourceType.smbc,
+            record_hash=record_hash,
+            category="Uncategorized",
+        ))
+    return rows
+
+
+def peak_memory(fn, content: bytes) -> int:
+    tracemalloc.start()
+    try:
+        fn(content)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(label: str, fn, content: bytes, rows: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - start)
+    rate = rows / best
+    peak = peak_memory(fn, content) / (1024 * 1024)
+    print(f"  {label:<12} {best * 1000:10.1f} ms  {rate:14,.0f} rows/sec  {peak:8.1f} MiB peak")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000, help="rows per synthetic statement")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    cases = [
+        ("PayPay", make_paypay_csv, iterrows_paypay, PayPayParser()),
+        ("SMBC", make_smbc_csv, iterrows_smbc, SMBCParser()),
+    ]
+    for name, make_csv, baseline, current in cases:
+        print(f"{name} ({args.rows:,} rows)")
+        content = make_csv(args.rows)
+        before = measure("iterrows", baseline, content, args.rows, args.repeat)
+        after = measure("current", lambda c: current.parse(c, "bench.csv"), content, args.rows, args.repeat)
+        print(f"  speedup      {after / before:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for transaction categorization.
+
+Generates rule sets of 10 to 10k keywords (katakana, kanji and ASCII names,
+with full-width and spacing variants like the ones in seed_rules.py) and
+merchant streams with realistic repetition. It then measures:
+
+  legacy      the original per-rule normalize-and-scan loop (skipped when
+              rules x rows exceeds --legacy-max-ops)
+  automaton   KeywordMatcher.match without the memo
+  categorize  TransactionRepository.apply_auto_categorization with a shared
+              matcher, as the importer calls it
+  recategorize  TransactionRepository.recategorize over a SQLite database of
+              --db-rows transactions (a million by default), with the total
+              time of the pass
+
+Throughput and per-call latency percentiles are printed and, with --output,
+written as JSON so runs can be compared across releases.
+
+Usage:
+    python benchmarks/bench_rule_matching.py --rules 10,100,1000,10000 --rows 10000,1000000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# Add the backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.core.matching import KeywordMatcher
+from src.infrastructure.migrations import upgrade_database
+from src.infrastructure.models import CategoryRule, ParsedTransaction, SourceType
+from src.infrastructure.repositories import TransactionRepository
+
+KATAKANA = "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワン"
+KANJI = "東西南北山川田中大小新高銀座駅前本店電気食堂書房薬局"
+SUFFIXES = ["", "店", "銀座店", " 新宿店", "　渋谷店", "ストア", "ストアー", "マート"]
+CATEGORIES = [
+    "Convenience Store", "Groceries", "Fast Food", "Coffee", "Transportation",
+    "Department Store", "Electronics", "Pharmacy", "Entertainment", "Online Shopping",
+]
+
+
+def to_full_width(text: str) -> str:
+    return "".join(chr(ord(c) + 0xFEE0) if "!" <= c <= "~" else c for c in text)
+
+
+def make_keyword(rnd: random.Random) -> str:
+    kind = rnd.random()
+    if kind < 0.5:
+        return "".join(rnd.choice(KATAKANA) for _ in range(rnd.randint(3, 7)))
+    if kind < 0.75:
+        return "".join(rnd.choice(KANJI) for _ in range(rnd.randint(2, 4)))
+    word = "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rnd.randint(3, 8)))
+    return word.upper() if rnd.random() < 0.3 else word.capitalize()
+
+
+def make_rules(count: int, seed: int = 0) -> list:
+    """(keyword, category) pairs with longer variants and width/spacing duplicates of some keywords."""
+    rnd = random.Random(seed)
+    rules = []
+    while len(rules) < count:
+        keyword = make_keyword(rnd)
+        category = rnd.choice(CATEGORIES)
+        rules.append((keyword, category))
+        variant = rnd.random()
+        if variant < 0.1:
+            # A longer, more specific keyword that must win over the short one
+            rules.append((keyword + rnd.choice(["ストアー", "マーケット", "100"]), rnd.choice(CATEGORIES)))
+        elif variant < 0.15:
+            rules.append((to_full_width(keyword), category))
+        elif variant < 0.2 and len(keyword) > 3:
+            rules.append((keyword[:2] + " " + keyword[2:], category))
+    return rules[:count]
+
+
+def make_merchants(rules: list, rows: int, distinct: int = 500, seed: int = 0) -> list:
+    """A stream of merchant names drawn from a pool with a skewed (Zipf-like) distribution.
+
+    About 80% of the pool contains a rule keyword; the rest match nothing.
+    """
+    rnd = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        if rnd.random() < 0.8:
+            keyword = rnd.choice(rules)[0]
+            if rnd.random() < 0.2:
+                keyword = to_full_width(keyword)
+            pool.append(keyword + rnd.choice(SUFFIXES))
+        else:
+            pool.append("".join(rnd.choice(KANJI) for _ in range(rnd.randint(3, 6))) + rnd.choice(SUFFIXES))
+    weights = [1 / (rank + 1) for rank in range(distinct)]
+    return rnd.choices(pool, weights=weights, k=rows)
+
+
+def legacy_categorize(merchant: str, rules: list):
+    """The original apply_auto_categorization loop, kept as the 'before' baseline."""
+    if not merchant:
+        return None
+
+    def normalize_string(s):
+        result = ''
+        for char in s:
+            if 0xFF01 <= ord(char) <= 0xFF5E:
+                result += chr(ord(char) - 0xFEE0)
+            else:
+                result += char
+        return result
+
+    merchant_normalized = normalize_string(str(merchant).lower())
+    matching_rules = []
+    for keyword, category in rules:
+        if not keyword:
+            continue
+        rule_kw = normalize_string(keyword.lower())
+        merchant_no_spaces = merchant_normalized.replace(' ', '').replace('　', '')
+        rule_no_spaces = rule_kw.replace(' ', '').replace('　', '')
+        if (rule_kw in merchant_normalized or
+                rule_no_spaces in merchant_no_spaces or
+                merchant_no_spaces.find(rule_no_spaces) >= 0):
+            matching_rules.append((keyword, category))
+    if matching_rules:
+        return max(matching_rules, key=lambda r: len(r[0]))[1]
+    return None
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def time_calls(fn, items) -> dict:
+    """Call fn once per item, timing every call."""
+    latencies = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for item in items:
+        t0 = clock()
+        fn(item)
+        latencies.append(clock() - t0)
+    total = (clock() - start) / 1e9
+    latencies.sort()
+    return {
+        "rows_per_sec": len(items) / total,
+        "total_sec": total,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p95_us": percentile(latencies, 0.95) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "max_us": latencies[-1] / 1000,
+    }
+
+
+def bench_recategorize(rules: list, db_rows: int) -> dict:
+    """Time a full recategorize() pass over a fresh file-backed database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        upgrade_database(engine)
+        # The search index plays no part in recategorization (its update
+        # trigger fires on merchant and description only), yet maintaining it
+        # would dominate loading a million rows, so it is left empty here
+        with engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER transactions_fts_insert"))
+        session = sessionmaker(bind=engine)()
+        base = date(2023, 1, 1)
+        records = [
+            ParsedTransaction(
+                date=base + timedelta(days=i % 730),
+                amount=100 + i % 5000,
+                merchant=merchant,
+                description="",
+                source="PayPay",
+                source_type=SourceType.paypay,
+                record_hash=f"bench-{i}",
+            )
+            for i, merchant in enumerate(make_merchants(rules, db_rows, seed=1))
+        ]
+        TransactionRepository.bulk_create(session, records, batch_size=5000)
+        session.add_all(CategoryRule(keyword=keyword, category=category) for keyword, category in rules)
+        session.commit()
+
+        start = time.perf_counter()
+        scanned, changed = TransactionRepository.recategorize(session)
+        total = time.perf_counter() - start
+        session.close()
+        engine.dispose()
+    return {"rows_per_sec": scanned / total, "total_sec": total, "scanned": scanned, "changed": changed}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def parse_sizes(value: str) -> list:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rules", type=parse_sizes, default=parse_sizes("10,100,1000,10000"),
+                        help="comma-separated rule set sizes")
+    parser.add_argument("--rows", type=parse_sizes, default=parse_sizes("10000,100000"),
+                        help="comma-separated merchant stream lengths (up to 1000000)")
+    parser.add_argument("--db-rows", type=int, default=1000000,
+                        help="transactions in the recategorize database (0 to skip)")
+    parser.add_argument("--legacy-max-ops", type=int, default=20_000_000,
+                        help="skip the legacy loop when rules x rows exceeds this")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+
+    def record(name, rules, rows, stats):
+        results.append({"benchmark": name, "rules": rules, "rows": rows, **stats})
+        if "p50_us" in stats:
+            detail = f"p50 {stats['p50_us']:8.1f}  p99 {stats['p99_us']:8.1f} us"
+        else:
+            detail = f"{stats['total_sec']:8.1f} s total, {stats['changed']:,} changed"
+        print(f"  {name:<13} {rows:>9,} rows  {stats['rows_per_sec']:14,.0f} rows/sec  {detail}")
+
+    for rule_count in args.rules:
+        rules = make_rules(rule_count)
+        start = time.perf_counter()
+        matcher = KeywordMatcher(rules, memo_size=0)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"{rule_count:,} rules (automaton built in {build_ms:.1f} ms)")
+        results.append({"benchmark": "build", "rules": rule_count, "rows": 0, "total_sec": build_ms / 1000})
+
+        for rows in args.rows:
+            merchants = make_merchants(rules, rows)
+
+            if rule_count * rows <= args.legacy_max_ops:
+                record("legacy", rule_count, rows, time_calls(lambda m: legacy_categorize(m, rules), merchants))
+
+            record("automaton", rule_count, rows, time_calls(matcher.match, merchants))
+
+            # The import path: parsed records carrying merchant_key, one shared matcher with its memo
+            shared = KeywordMatcher(rules)
+            records = [
+                ParsedTransaction(date(2024, 1, 1), 100, m, "", "PayPay", SourceType.paypay, str(i))
+                for i, m in enumerate(merchants)
+            ]
+            stats = time_calls(lambda t: TransactionRepository.apply_auto_categorization(None, t, shared), records)
+            info = shared.memo_info()
+            stats["memo_hit_rate"] = info.hits / max(1, info.hits + info.misses)
+            record("categorize", rule_count, rows, stats)
+
+        if args.db_rows:
+            record("recategorize", rule_count, args.db_rows, bench_recategorize(rules, args.db_rows))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "suite": "rule_matching",
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.database import engine
+from src.infrastructure.migrations import compact_database, upgrade_database
+
+def compact():
+    upgrade_database(engine)
+    print("Compacting database and rebuilding the search index...")
+    compact_database(engine)
+    print("Database compacted successfully.")
+
+if __name__ == "__main__":
+    compact()
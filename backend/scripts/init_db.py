@@ -4,12 +4,12 @@ import os
 # Add src to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.infrastructure.database import engine, Base
-from src.infrastructure.models import Transaction
+from src.infrastructure.database import engine
+from src.infrastructure.migrations import upgrade_database
 
 def init_db():
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
     print("Tables created successfully.")
 
 if __name__ == "__main__":
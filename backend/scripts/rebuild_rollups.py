@@ -0,0 +1,18 @@
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.database import engine
+from src.infrastructure.migrations import rebuild_daily_rollups, upgrade_database
+
+def rebuild_rollups():
+    upgrade_database(engine)
+    print("Rebuilding daily rollups...")
+    with engine.begin() as conn:
+        rebuild_daily_rollups(conn)
+    print("Daily rollups rebuilt successfully.")
+
+if __name__ == "__main__":
+    rebuild_rollups()
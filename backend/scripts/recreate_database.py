@@ -10,10 +10,10 @@ from datetime import datetime
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
-# Add the src directory to Python path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+# Add the backend directory to Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from infrastructure.models import Base, Transaction, CategoryRule, SourceType
+from src.infrastructure.migrations import upgrade_database
 
 def recreate_database():
     # Get the database path from the configuration
@@ -32,7 +32,7 @@ def recreate_database():
     # Create new database and tables
     print("Creating new database...")
     engine = create_engine("sqlite:///./moneyflow.db", connect_args={"check_same_thread": False})
-    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
     print("Database created successfully!")
 
     # Verify tables were created
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from src.api import transactions
+from src.infrastructure.database import SessionLocal
+from src.infrastructure.migrations import upgrade_database
+from src.infrastructure.repositories import TransactionRepository
 
 app = FastAPI(title="MoneyFlow API")
 
@@ -12,6 +15,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+def upgrade_schema():
+    # Create new tables and apply pending schema upgrades
+    upgrade_database()
+    # Freeze closed months now rather than on the first dashboard request
+    with SessionLocal() as session:
+        TransactionRepository.build_month_snapshots(session)
+
 app.include_router(transactions.router, prefix="/api/transactions", tags=["transactions"])
 
 @app.get("/")
@@ -1,63 +1,106 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, UploadFile, File, Depends, Header, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import io
 import csv
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 
 from src.infrastructure.database import get_db
-from src.infrastructure.repositories import TransactionRepository
-from src.infrastructure.parsers import get_parser
+from src.infrastructure.repositories import TRANSACTIONS_VERSION, TransactionRepository
+from src.infrastructure.importer import import_files, import_stream
+from src.infrastructure.jobs import ImportJobManager, get_import_jobs
 from src.domain.schemas import (
     TransactionRead,
     TransactionUpdate,
+    RecategorizeRequest,
+    RecategorizeSummary,
     UploadSummary,
+    BatchUploadSummary,
+    ImportJobRead,
     DashboardStats,
     CategoryRuleCreate,
-    CategoryRuleRead
+    CategoryRuleRead,
+    CategoryRuleBulkCreate,
+    CategoryRuleBulkSummary,
+    RuleMatchStats,
+    RulePreview
 )
 
 router = APIRouter()
 
 @router.post("/upload", response_model=UploadSummary)
-async def upload_transactions(
+def upload_transactions(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
     try:
-        content = await file.read()
         filename = file.filename or "unknown.csv"
-        
-        parser = get_parser(filename, content)
-        transactions = parser.parse(content, filename)
-        
-        imported_count = 0
-        skipped_count = 0
-        
-        for t in transactions:
-            # Check duplicate
-            existing = TransactionRepository.get_by_hash(db, t.record_hash)
-            if existing:
-                skipped_count += 1
-            else:
-                # Apply auto-categorization before saving
-                TransactionRepository.apply_auto_categorization(db, t)
-                TransactionRepository.create(db, t)
-                imported_count += 1
-                
-        return UploadSummary(
-            imported=imported_count,
-            skipped=skipped_count,
-            message=f"Processing complete. {imported_count} imported, {skipped_count} skipped."
-        )
-        
+
+        # Parse and persist the upload in bounded batches straight from the
+        # spooled upload file instead of reading it into memory first
+        return import_stream(db, file.file, filename)
+
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@router.post("/upload/batch", response_model=BatchUploadSummary)
+def upload_transactions_batch(
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db)
+):
+    """Import several CSV files at once, parsing them in parallel."""
+    try:
+        uploads = [(f.file, f.filename or "unknown.csv") for f in files]
+        return import_files(db, uploads)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.post("/imports", response_model=ImportJobRead, status_code=202)
+def create_import_job(
+    file: UploadFile = File(...),
+    jobs: ImportJobManager = Depends(get_import_jobs)
+):
+    """Accept an upload and import it in the background; poll the returned job for progress."""
+    try:
+        return jobs.submit(file.file, file.filename or "unknown.csv")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/imports/{job_id}", response_model=ImportJobRead)
+def get_import_job(
+    job_id: str,
+    jobs: ImportJobManager = Depends(get_import_jobs)
+):
+    """Get the progress, and once finished the summary, of an import job."""
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+@router.post("/recategorize", response_model=RecategorizeSummary)
+def recategorize_transactions(
+    request: RecategorizeRequest,
+    db: Session = Depends(get_db)
+):
+    """Re-apply the current category rules to existing transactions in scope."""
+    scanned, changed = TransactionRepository.recategorize(
+        db,
+        start_date=request.start_date,
+        end_date=request.end_date,
+        source=request.source,
+        uncategorized_only=request.uncategorized_only
+    )
+    return RecategorizeSummary(
+        scanned=scanned,
+        changed=changed,
+        message=f"Recategorization complete. {changed} of {scanned} transactions changed."
+    )
+
 @router.get("/", response_model=List[TransactionRead])
 def list_transactions(
     skip: int = 0,
@@ -66,6 +109,28 @@ def list_transactions(
 ):
     return TransactionRepository.get_all(db, skip=skip, limit=limit)
 
+@router.get("/search", response_model=List[TransactionRead])
+def search_transactions(
+    q: str = Query(..., min_length=1, description="Text to find in merchant or description"),
+    start_date: Optional[date] = Query(None, description="Start date in YYYY-MM-DD format"),
+    end_date: Optional[date] = Query(None, description="End date in YYYY-MM-DD format"),
+    source: Optional[str] = None,
+    category: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(50, le=500),
+    db: Session = Depends(get_db)
+):
+    """Search transactions by merchant or description, best matches first."""
+    return TransactionRepository.search(
+        db, q,
+        start_date=start_date,
+        end_date=end_date,
+        source=source,
+        category=category,
+        skip=skip,
+        limit=limit
+    )
+
 @router.get("/template")
 def download_template():
     # date,amount,description,category
@@ -83,54 +148,29 @@ def download_template():
 
 @router.get("/stats", response_model=DashboardStats)
 def get_dashboard_stats(
-    start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
-    end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
+    start_date: Optional[date] = Query(None, description="Start date in YYYY-MM-DD format"),
+    end_date: Optional[date] = Query(None, description="End date in YYYY-MM-DD format"),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Get dashboard statistics formatted for charts."""
-
-    # Get weekly spending trends by category
-    weekly_trends_data = TransactionRepository.get_weekly_spending_by_category(db, start_date, end_date)
-
-    # Get source breakdown
-    source_data = TransactionRepository.get_source_breakdown(db, start_date, end_date)
-    source_breakdown = [
-        {
-            "source": item["source"],
-            "amount": item["amount"],
-            "percentage": item["percentage"]
-        }
-        for item in source_data
-    ]
-
-    # Get top merchants
-    merchant_data = TransactionRepository.get_top_merchants(db, start_date=start_date, end_date=end_date)
-    top_merchants = [
-        {
-            "merchant": item.merchant or "Unknown",
-            "amount": int(item.amount),
-            "count": item.count
-        }
-        for item in merchant_data
-    ]
-
-    # Get category spending
-    category_data = TransactionRepository.get_category_spending(db, start_date, end_date)
-    category_spending = [
-        {
-            "category": item["category"],
-            "amount": item["amount"],
-            "percentage": item["percentage"]
-        }
-        for item in category_data
-    ]
-
-    return DashboardStats(
-        weekly_trends=weekly_trends_data,
-        source_breakdown=source_breakdown,
-        top_merchants=top_merchants,
-        category_spending=category_spending
-    )
+    """Get dashboard statistics formatted for charts.
+
+    The ETag changes whenever transactions do; a request carrying the
+    current one in If-None-Match gets 304 without the stats being computed.
+    """
+    version = TransactionRepository.get_data_version(db, TRANSACTIONS_VERSION)
+    etag = f'"stats-{version}-{start_date or ""}-{end_date or ""}"'
+    # Browsers revalidate with If-None-Match before reusing their copy
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    stats = TransactionRepository.get_cached_dashboard_stats(db, start_date, end_date, version)
+    return JSONResponse(jsonable_encoder(stats), headers=headers)
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
 
 # Category Rules endpoints
 @router.get("/category-rules", response_model=list[CategoryRuleRead])
@@ -139,21 +179,64 @@ def get_category_rules(db: Session = Depends(get_db)):
     rules = TransactionRepository.get_all_category_rules(db)
     return rules
 
+@router.post("/category-rules/bulk", response_model=CategoryRuleBulkSummary)
+def bulk_create_category_rules(
+    bulk: CategoryRuleBulkCreate,
+    db: Session = Depends(get_db)
+):
+    """Create many category rules at once, skipping exact duplicates."""
+    created, skipped = TransactionRepository.bulk_create_category_rules(
+        db, ((rule.keyword, rule.category) for rule in bulk.rules), replace=bulk.replace
+    )
+    return CategoryRuleBulkSummary(
+        created=created,
+        skipped=skipped,
+        message=f"Import complete. {created} rules created, {skipped} duplicates skipped."
+    )
+
+@router.get("/category-rules/export", response_model=CategoryRuleBulkCreate)
+def export_category_rules(db: Session = Depends(get_db)):
+    """Export all category rules in the format accepted by /category-rules/bulk."""
+    rules = TransactionRepository.get_all_category_rules(db)
+    return CategoryRuleBulkCreate(
+        rules=[CategoryRuleCreate(keyword=rule.keyword, category=rule.category) for rule in rules]
+    )
+
+@router.get("/category-rules/preview", response_model=RulePreview)
+def preview_category_rule(
+    keyword: str = Query(..., description="Candidate rule keyword"),
+    db: Session = Depends(get_db)
+):
+    """Preview how many existing transactions a rule with this keyword would capture."""
+    try:
+        return TransactionRepository.preview_category_rule(db, keyword)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/category-rules/match-stats", response_model=RuleMatchStats)
+def get_rule_match_stats(db: Session = Depends(get_db)):
+    """Get hit/miss counters of the merchant-to-category memo used by imports."""
+    return TransactionRepository.get_rule_match_stats(db)
+
 @router.post("/category-rules", response_model=CategoryRuleRead)
 def create_category_rule(
     rule: CategoryRuleCreate,
+    apply_to_existing: bool = Query(False, description="Also recategorize existing transactions"),
     db: Session = Depends(get_db)
 ):
     """Create a new category rule."""
-    return TransactionRepository.create_category_rule(db, rule.keyword, rule.category)
+    return TransactionRepository.create_category_rule(
+        db, rule.keyword, rule.category, apply_to_existing=apply_to_existing
+    )
 
 @router.delete("/category-rules/{rule_id}")
 def delete_category_rule(
     rule_id: str,
+    apply_to_existing: bool = Query(False, description="Also recategorize existing transactions"),
     db: Session = Depends(get_db)
 ):
     """Delete a category rule."""
-    success = TransactionRepository.delete_category_rule(db, rule_id)
+    success = TransactionRepository.delete_category_rule(db, rule_id, apply_to_existing=apply_to_existing)
     if not success:
         raise HTTPException(status_code=404, detail="Category rule not found")
     return {"message": "Category rule deleted successfully"}
@@ -172,8 +255,10 @@ def update_transaction(
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    # Update the category
+    # Update the category; a category set by hand is kept when rules change
     transaction.category = update.category
+    transaction.category_locked = True
+    TransactionRepository.bump_data_version(db, TRANSACTIONS_VERSION)
 
     db.commit()
     db.refresh(transaction)
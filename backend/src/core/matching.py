@@ -0,0 +1,110 @@
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Full-width ASCII (U+FF01-U+FF5E) maps to half-width; spaces, including the
+# full-width ideographic space, are dropped so "ＡＭ　ＰＭ" matches "am pm"
+_NORMALIZE_TABLE = {code: code - 0xFEE0 for code in range(0xFF01, 0xFF5F)}
+_NORMALIZE_TABLE.update({ord(' '): None, ord('　'): None})
+
+# Merchant keys whose resolved category each matcher remembers. Statements
+# repeat a few hundred merchants, so this covers them with room to spare.
+MATCH_MEMO_SIZE = 4096
+
+
+def normalize_keyword(value: str) -> str:
+    """Normalize a merchant name or rule keyword for matching."""
+    return value.lower().translate(_NORMALIZE_TABLE)
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over normalized category rule keywords.
+
+    match() finds the category of the best rule whose keyword occurs in a
+    merchant name in one pass over the name, however many rules there are.
+    The best rule is the one with the longest keyword (as written, before
+    normalization); among equally long keywords the earliest rule wins.
+
+    Results are memoized per merchant key in a bounded LRU. A matcher never
+    changes once built, so the memo stays valid for the matcher's lifetime.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[str, str]], memo_size: int = MATCH_MEMO_SIZE):
+        """Compile (keyword, category) pairs; rules with empty keywords are ignored."""
+        # Node i: _goto[i] maps a character to the next node, _best[i] is the
+        # best rule ending at node i or at any suffix of it, as (rank, category)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._best: List[Optional[Tuple[Tuple[int, int], str]]] = [None]
+        self.size = 0
+
+        for index, (keyword, category) in enumerate(rules):
+            if not keyword:
+                continue
+            self.size += 1
+            node = 0
+            for char in normalize_keyword(keyword):
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._best.append(None)
+                node = next_node
+            self._best[node] = self._better(self._best[node], ((len(keyword), -index), category))
+
+        self._fail = [0] * len(self._goto)
+        self._link_failures()
+        self._memo = lru_cache(maxsize=memo_size)(self._scan)
+
+    @staticmethod
+    def _better(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a if a[0] >= b[0] else b
+
+    def _link_failures(self):
+        # Breadth-first, so a node's failure target is finished before the node
+        queue = deque()
+        for node in self._goto[0].values():
+            self._best[node] = self._better(self._best[node], self._best[0])
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._best[child] = self._better(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    def match(self, merchant: Optional[str]) -> Optional[str]:
+        """Category of the best rule matching merchant, or None when no rule matches."""
+        if not merchant:
+            return None
+        return self._memo(normalize_keyword(str(merchant)))
+
+    def match_key(self, key: Optional[str]) -> Optional[str]:
+        """Like match(), for a merchant name already passed through normalize_keyword()."""
+        if not key:
+            return None
+        return self._memo(key)
+
+    def memo_info(self):
+        """Hits, misses, maxsize and currsize of the match memo (see functools.lru_cache)."""
+        return self._memo.cache_info()
+
+    def _scan(self, key: str) -> Optional[str]:
+        goto, fail, best_at = self._goto, self._fail, self._best
+        node = 0
+        best = best_at[0]
+        for char in key:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            candidate = best_at[node]
+            if candidate is not None and (best is None or candidate[0] > best[0]):
+                best = candidate
+        return best[1] if best is not None else None
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import date, datetime
+from enum import Enum
 from typing import List, Optional, Dict, Any
 from src.infrastructure.models import SourceType
 
@@ -12,6 +13,7 @@ class TransactionRead(BaseModel):
     category: Optional[str] = None
     source: str
     source_type: SourceType
+    category_locked: bool = False
     created_at: datetime
 
     class Config:
@@ -22,6 +24,35 @@ class UploadSummary(BaseModel):
     skipped: int
     message: str
 
+class FileUploadSummary(BaseModel):
+    filename: str
+    imported: int = 0
+    skipped: int = 0
+    message: str
+    error: Optional[str] = None
+
+class BatchUploadSummary(BaseModel):
+    files: List[FileUploadSummary]
+    imported: int
+    skipped: int
+    message: str
+
+class ImportJobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class ImportJobRead(BaseModel):
+    id: str
+    filename: str
+    status: ImportJobStatus
+    rows_parsed: int = 0
+    imported: int = 0
+    skipped: int = 0
+    summary: Optional[UploadSummary] = None
+    error: Optional[str] = None
+
 class WeeklyTrendData(BaseModel):
     week: str
     week_label: str
@@ -56,14 +87,58 @@ class CategoryRuleCreate(BaseModel):
     keyword: str
     category: str
 
+class RulePreviewSample(BaseModel):
+    merchant: str
+    transactions: int
+    current_category: Optional[str] = None
+    captured: bool
+
+class RulePreview(BaseModel):
+    keyword: str
+    matched: int
+    captured: int
+    kept_by_longer_rules: int
+    samples: List[RulePreviewSample]
+
+class RuleMatchStats(BaseModel):
+    rules_version: int
+    rules: int
+    hits: int
+    misses: int
+    cached: int
+    max_cached: int
+
+class CategoryRuleBulkCreate(BaseModel):
+    rules: List[CategoryRuleCreate]
+    # Drop every existing rule first instead of adding to them
+    replace: bool = False
+
+class CategoryRuleBulkSummary(BaseModel):
+    created: int
+    skipped: int
+    message: str
+
 class TransactionUpdate(BaseModel):
     category: str
 
+class RecategorizeRequest(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    source: Optional[str] = None
+    uncategorized_only: bool = False
+
+class RecategorizeSummary(BaseModel):
+    scanned: int
+    changed: int
+    message: str
+
 class CategoryRuleRead(BaseModel):
     id: str
     keyword: str
     category: str
     created_at: datetime
+    # Transactions recategorized when the rule was applied to existing ones
+    recategorized: Optional[int] = None
 
     class Config:
         from_attributes = True
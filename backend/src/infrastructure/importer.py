@@ -0,0 +1,208 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import closing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import BinaryIO, Callable, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from .models import ParsedTransaction
+from .parsers import DEFAULT_BATCH_SIZE, SNIFF_BYTES, BaseParser, get_parser
+from .repositories import BULK_INSERT_BATCH_SIZE, TransactionRepository
+from ..core.matching import KeywordMatcher
+from ..domain.schemas import BatchUploadSummary, FileUploadSummary, UploadSummary
+
+# Called after every batch with the running (rows_parsed, imported, skipped) totals
+ProgressCallback = Callable[[int, int, int], None]
+
+# Worker processes that parse the files of a multi-file upload in parallel
+MAX_PARSE_PROCESSES = min(4, os.cpu_count() or 1)
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_lock = threading.Lock()
+
+
+def import_batch(
+    session: Session,
+    transactions: List[ParsedTransaction],
+    insert_batch_size: int = BULK_INSERT_BATCH_SIZE,
+    matcher: Optional[KeywordMatcher] = None
+) -> Tuple[int, int]:
+    """Deduplicate, categorize and persist one batch of parsed transactions.
+
+    Returns the (imported, skipped) counts for the batch.
+    """
+    if matcher is None:
+        matcher = TransactionRepository.get_keyword_matcher(session)
+    new_transactions = []
+    skipped_count = 0
+
+    # One set-based lookup per batch instead of a SELECT per row. Hashes
+    # accepted earlier in the batch are added to the set as well, so
+    # duplicates within the same file are skipped too.
+    seen = TransactionRepository.get_existing_hashes(session, (t.record_hash for t in transactions))
+
+    for t in transactions:
+        if t.record_hash in seen:
+            skipped_count += 1
+        else:
+            seen.add(t.record_hash)
+            # Apply auto-categorization before saving
+            TransactionRepository.apply_auto_categorization(session, t, matcher)
+            new_transactions.append(t)
+
+    imported_count = TransactionRepository.bulk_create(session, new_transactions, insert_batch_size)
+    # Rows another import stored since the lookup above are skipped by the INSERT
+    skipped_count += len(new_transactions) - imported_count
+    return imported_count, skipped_count
+
+
+def import_batches(
+    session: Session,
+    batches: Iterable[List[ParsedTransaction]],
+    insert_batch_size: int = BULK_INSERT_BATCH_SIZE,
+    progress: Optional[ProgressCallback] = None
+) -> UploadSummary:
+    """Import parsed batches one at a time, so only one batch is held in memory."""
+    # Compile the category rules once for the whole import
+    matcher = TransactionRepository.get_keyword_matcher(session)
+    parsed_count = 0
+    imported_count = 0
+    skipped_count = 0
+
+    for batch in batches:
+        imported, skipped = import_batch(session, batch, insert_batch_size, matcher)
+        parsed_count += len(batch)
+        imported_count += imported
+        skipped_count += skipped
+        if progress:
+            progress(parsed_count, imported_count, skipped_count)
+
+    # Once per import rather than per batch, as each batch may touch the same months again
+    if imported_count:
+        TransactionRepository.build_month_snapshots(session)
+    return UploadSummary(
+        imported=imported_count,
+        skipped=skipped_count,
+        message=f"Processing complete. {imported_count} imported, {skipped_count} skipped."
+    )
+
+
+def detect_parser(stream: BinaryIO, filename: str) -> BaseParser:
+    """Pick the parser for a seekable binary stream from its first bytes.
+
+    Raises ValueError for unknown formats. The stream is rewound afterwards.
+    """
+    head = stream.read(SNIFF_BYTES)
+    stream.seek(0)
+    return get_parser(filename, head)
+
+
+def import_stream(
+    session: Session,
+    stream: BinaryIO,
+    filename: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[ProgressCallback] = None
+) -> UploadSummary:
+    """Detect the format of a seekable binary stream and import it batch by batch.
+
+    batch_size bounds both the rows parsed at a time and the rows per INSERT.
+    """
+    parser = detect_parser(stream, filename)
+    # Finalize the batch generator here, while the caller's stream is still
+    # open, even when the import fails partway
+    with closing(parser.iter_batches(stream, batch_size)) as batches:
+        return import_batches(session, batches, batch_size, progress)
+
+
+def parse_file(path: str, filename: str, batch_size: int = DEFAULT_BATCH_SIZE) -> List[List[ParsedTransaction]]:
+    """Parse a whole file into batches. Runs in a parse worker process."""
+    with open(path, "rb") as stream:
+        parser = detect_parser(stream, filename)
+        return list(parser.iter_batches(stream, batch_size))
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    """The shared parse process pool, started on first use."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            # spawn rather than fork: the API process runs threads of its own
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=MAX_PARSE_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
+
+
+def import_files(
+    session: Session,
+    uploads: List[Tuple[BinaryIO, str]],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> BatchUploadSummary:
+    """Import several (stream, filename) uploads at once.
+
+    Files are parsed in parallel in the parse process pool, while this process
+    is the single writer: it deduplicates and persists each file's results in
+    upload order, so a row repeated across files is imported once and counted
+    as skipped for the later files.
+    """
+    pool = get_parse_pool()
+    futures: List[Tuple[str, Optional[Future], Optional[str]]] = []
+    paths = []
+
+    try:
+        for stream, filename in uploads:
+            try:
+                detect_parser(stream, filename)
+            except ValueError as e:
+                futures.append((filename, None, str(e)))
+                continue
+
+            with tempfile.NamedTemporaryFile(prefix="moneyflow-upload-", suffix=".csv", delete=False) as spool:
+                shutil.copyfileobj(stream, spool)
+            paths.append(spool.name)
+            futures.append((filename, pool.submit(parse_file, spool.name, filename, batch_size), None))
+
+        results = []
+        for filename, future, error in futures:
+            # Running (imported, skipped) totals of the batches committed so far
+            committed = [0, 0]
+
+            def progress(rows_parsed: int, imported: int, skipped: int):
+                committed[:] = imported, skipped
+
+            if future is not None:
+                try:
+                    summary = import_batches(session, future.result(), batch_size, progress)
+                    results.append(FileUploadSummary(filename=filename, **summary.model_dump()))
+                    continue
+                except Exception as e:
+                    session.rollback()
+                    error = str(e)
+            # Batches committed before a failure stay imported and are reported as such
+            imported, skipped = committed
+            message = f"Import failed: {error}"
+            if imported or skipped:
+                message = f"Import failed after {imported} imported, {skipped} skipped: {error}"
+            results.append(FileUploadSummary(
+                filename=filename, imported=imported, skipped=skipped, message=message, error=error
+            ))
+    finally:
+        for path in paths:
+            os.remove(path)
+
+    imported_count = sum(r.imported for r in results)
+    skipped_count = sum(r.skipped for r in results)
+    failed_count = sum(1 for r in results if r.error)
+    return BatchUploadSummary(
+        files=results,
+        imported=imported_count,
+        skipped=skipped_count,
+        message=(
+            f"Processing complete. {len(results) - failed_count} of {len(results)} files imported: "
+            f"{imported_count} imported, {skipped_count} skipped."
+        )
+    )
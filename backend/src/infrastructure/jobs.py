@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Optional
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from .importer import detect_parser, import_stream
+from ..domain.schemas import ImportJobRead, ImportJobStatus
+
+# Imports running at the same time; further jobs wait in the queue
+MAX_IMPORT_WORKERS = 2
+
+# Finished jobs kept around for polling before the oldest are dropped
+MAX_RETAINED_JOBS = 100
+
+
+class ImportJobManager:
+    """Runs uploads as background import jobs on a bounded thread pool.
+
+    Job state is kept in memory as ImportJobRead snapshots that are replaced
+    (never mutated) under a lock, so readers always see a consistent view.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_workers: int = MAX_IMPORT_WORKERS
+    ):
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="import")
+        self._jobs: "OrderedDict[str, ImportJobRead]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, stream: BinaryIO, filename: str) -> ImportJobRead:
+        """Queue an import of a seekable upload stream and return its job.
+
+        The format is checked up front (ValueError for unknown formats) and the
+        upload is copied to a temporary file, since the request's upload file
+        is closed as soon as the response is sent.
+        """
+        detect_parser(stream, filename)
+
+        with tempfile.NamedTemporaryFile(prefix="moneyflow-import-", suffix=".csv", delete=False) as spool:
+            shutil.copyfileobj(stream, spool)
+
+        job = ImportJobRead(id=str(uuid.uuid4()), filename=filename, status=ImportJobStatus.queued)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job.id, spool.name, filename)
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJobRead]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _update(self, job_id: str, **changes):
+        with self._lock:
+            self._jobs[job_id] = self._jobs[job_id].model_copy(update=changes)
+
+    def _prune(self):
+        # Drop the oldest finished jobs once more than MAX_RETAINED_JOBS are kept
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job.status in (ImportJobStatus.completed, ImportJobStatus.failed)
+        ]
+        for job_id in finished[:max(0, len(self._jobs) - MAX_RETAINED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self, job_id: str, path: str, filename: str):
+        self._update(job_id, status=ImportJobStatus.running)
+
+        def progress(rows_parsed: int, imported: int, skipped: int):
+            self._update(job_id, rows_parsed=rows_parsed, imported=imported, skipped=skipped)
+
+        session = self._session_factory()
+        try:
+            with open(path, "rb") as stream:
+                summary = import_stream(session, stream, filename, progress=progress)
+            self._update(job_id, status=ImportJobStatus.completed, summary=summary)
+        except Exception as e:
+            session.rollback()
+            self._update(job_id, status=ImportJobStatus.failed, error=str(e))
+        finally:
+            session.close()
+            os.remove(path)
+
+
+import_jobs = ImportJobManager()
+
+
+def get_import_jobs() -> ImportJobManager:
+    return import_jobs
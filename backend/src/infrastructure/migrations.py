@@ -0,0 +1,302 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from .database import Base, engine as default_engine
+from .models import DailyRollup, Transaction, merchant_key
+
+# Rows backfilled per UPDATE batch
+BACKFILL_BATCH_SIZE = 5000
+
+# Index entries ANALYZE samples per index (PRAGMA analysis_limit)
+ANALYSIS_LIMIT = 1000
+
+# Stats indexes transactions carried before the dashboard read daily_rollups
+RETIRED_TRANSACTION_INDEXES = (
+    "ix_transactions_category_date",
+    "ix_transactions_source_date",
+    "ix_transactions_merchant_date",
+    "ix_transactions_month_week_category",
+)
+
+
+def _column_names(conn: Connection, table: str) -> set[str]:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def add_merchant_key(conn: Connection):
+    """Add transactions.merchant_key with its index and backfill it from merchant."""
+    if "merchant_key" not in _column_names(conn, "transactions"):
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN merchant_key VARCHAR"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_transactions_merchant_key ON transactions (merchant_key)"
+    ))
+
+    # The normalization (width folding in particular) has no SQL equivalent,
+    # so keys are computed here, walking the rows in rowid order
+    keys = {}
+    last_rowid = 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT rowid, merchant FROM transactions"
+            " WHERE rowid > :last AND merchant_key IS NULL AND merchant IS NOT NULL"
+            " ORDER BY rowid LIMIT :limit"
+        ), {"last": last_rowid, "limit": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        updates = []
+        for row_id, merchant in rows:
+            if merchant not in keys:
+                keys[merchant] = merchant_key(merchant)
+            updates.append({"key": keys[merchant], "row_id": row_id})
+        conn.execute(text("UPDATE transactions SET merchant_key = :key WHERE rowid = :row_id"), updates)
+        last_rowid = rows[-1][0]
+
+
+def add_search_index(conn: Connection):
+    """Create the FTS5 trigram index over merchant and description, kept in sync by triggers.
+
+    transactions_fts is an external-content table: it stores only the index
+    and reads the text from transactions by rowid.
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transactions_fts'"
+    )).first()
+    if not exists:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE transactions_fts USING fts5("
+            "merchant, description, content='transactions', content_rowid='rowid', tokenize='trigram')"
+        ))
+        rebuild_search_index(conn)
+
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN"
+        " INSERT INTO transactions_fts (rowid, merchant, description)"
+        " VALUES (new.rowid, new.merchant, new.description);"
+        " END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN"
+        " INSERT INTO transactions_fts (transactions_fts, rowid, merchant, description)"
+        " VALUES ('delete', old.rowid, old.merchant, old.description);"
+        " END"
+    ))
+    # Category changes (recategorization, manual edits) leave the index alone
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF merchant, description"
+        " ON transactions BEGIN"
+        " INSERT INTO transactions_fts (transactions_fts, rowid, merchant, description)"
+        " VALUES ('delete', old.rowid, old.merchant, old.description);"
+        " INSERT INTO transactions_fts (rowid, merchant, description)"
+        " VALUES (new.rowid, new.merchant, new.description);"
+        " END"
+    ))
+
+
+def rebuild_search_index(conn: Connection):
+    """Re-index every transaction.
+
+    Needed after a VACUUM, which may renumber the rowids the index refers to.
+    """
+    conn.execute(text("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')"))
+
+
+def compact_database(engine: Engine = default_engine):
+    """VACUUM the database, then re-index the search index it invalidates.
+
+    transactions has a text primary key, so VACUUM is free to renumber its
+    rowids; merchant_keys_fts follows an integer primary key and is not
+    affected.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM"))
+    with engine.begin() as conn:
+        rebuild_search_index(conn)
+
+
+def add_category_locked(conn: Connection):
+    """Add transactions.category_locked; existing categories stay unlocked."""
+    if "category_locked" not in _column_names(conn, "transactions"):
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN category_locked BOOLEAN NOT NULL DEFAULT 0"))
+
+
+# Trigger statements that add a transaction (new.*) to, or remove one (old.*)
+# from, its daily_rollups row. A row whose count drops to zero is deleted.
+_ROLLUP_ADD = (
+    " INSERT INTO daily_rollups (day, month, week, category, source, merchant_key, merchant, amount, count)"
+    " VALUES ({row}.date, strftime('%Y-%m', {row}.date), strftime('%Y-%W', {row}.date),"
+    " {row}.category, {row}.source, coalesce({row}.merchant_key, ''), {row}.merchant, {row}.amount, 1)"
+    " ON CONFLICT (day, category, source, merchant_key) DO UPDATE SET"
+    " amount = amount + excluded.amount, count = count + 1, merchant = max(merchant, excluded.merchant);"
+)
+_ROLLUP_SUBTRACT = (
+    " UPDATE daily_rollups SET amount = amount - {row}.amount, count = count - 1"
+    " WHERE day = {row}.date AND category = {row}.category AND source = {row}.source"
+    " AND merchant_key = coalesce({row}.merchant_key, '');"
+    " DELETE FROM daily_rollups"
+    " WHERE day = {row}.date AND category = {row}.category AND source = {row}.source"
+    " AND merchant_key = coalesce({row}.merchant_key, '') AND count <= 0;"
+)
+
+
+def add_daily_rollups(conn: Connection):
+    """Keep daily_rollups in step with transactions through triggers.
+
+    The table itself comes from the model; it is filled from the existing
+    transactions the first time the triggers are installed.
+    """
+    installed = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'daily_rollups_insert'"
+    )).first()
+    _create_rollup_triggers(conn)
+    if not installed:
+        rebuild_daily_rollups(conn)
+
+
+def _create_rollup_triggers(conn: Connection):
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS daily_rollups_insert AFTER INSERT ON transactions BEGIN"
+        + _ROLLUP_ADD.format(row="new") + " END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS daily_rollups_delete AFTER DELETE ON transactions BEGIN"
+        + _ROLLUP_SUBTRACT.format(row="old") + " END"
+    ))
+    # Category edits and recategorization move amounts between rollup rows,
+    # unless a bulk update rebuilds them itself (see RollupPause)
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS daily_rollups_update"
+        " AFTER UPDATE OF date, amount, category, source, merchant_key ON transactions"
+        " WHEN NOT EXISTS (SELECT 1 FROM rollup_pauses) BEGIN"
+        + _ROLLUP_SUBTRACT.format(row="old") + _ROLLUP_ADD.format(row="new") + " END"
+    ))
+
+
+def rebuild_daily_rollups(conn: Connection):
+    """Recompute daily_rollups from scratch."""
+    conn.execute(text("DELETE FROM daily_rollups"))
+    conn.execute(text(
+        "INSERT INTO daily_rollups (day, month, week, category, source, merchant_key, merchant, amount, count)"
+        " SELECT date, strftime('%Y-%m', date), strftime('%Y-%W', date),"
+        " category, source, coalesce(merchant_key, ''), max(merchant), sum(amount), count(*)"
+        " FROM transactions GROUP BY date, category, source, coalesce(merchant_key, '')"
+    ))
+
+
+def add_date_buckets(conn: Connection):
+    """Add stored month and week columns and covering indexes to daily_rollups.
+
+    The rollup triggers are recreated so they fill the new columns. Databases
+    upgraded while transactions carried the same buckets lose them again:
+    nothing reads them since the dashboard moved to the rollup, and their
+    indexes slowed every import.
+    """
+    if "week" not in _column_names(conn, "daily_rollups"):
+        for name in ("month", "week"):
+            conn.execute(text(f"ALTER TABLE daily_rollups ADD COLUMN {name} VARCHAR"))
+        conn.execute(text("UPDATE daily_rollups SET month = strftime('%Y-%m', day), week = strftime('%Y-%W', day)"))
+        for name in ("insert", "delete", "update"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS daily_rollups_{name}"))
+        _create_rollup_triggers(conn)
+
+    for name in RETIRED_TRANSACTION_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    columns = _column_names(conn, "transactions")
+    for name in ("month", "week"):
+        if name in columns:
+            conn.execute(text(f"ALTER TABLE transactions DROP COLUMN {name}"))
+
+    for model in (Transaction, DailyRollup):
+        existing = {index["name"] for index in inspect(conn).get_indexes(model.__tablename__)}
+        for index in model.__table__.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+
+def add_month_snapshots(conn: Connection):
+    """Invalidate a month's snapshot whenever its daily_rollups rows change."""
+    for event, row in (("insert", "new"), ("update", "new"), ("delete", "old")):
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS month_snapshots_{event} AFTER {event.upper()} ON daily_rollups BEGIN"
+            f" DELETE FROM month_snapshots WHERE month = {row}.month;"
+            " END"
+        ))
+
+
+def add_rollup_pause(conn: Connection):
+    """Let bulk category updates pause the per-row rollup update trigger."""
+    definition = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'daily_rollups_update'"
+    )).scalar()
+    if definition is not None and "rollup_pauses" not in definition:
+        conn.execute(text("DROP TRIGGER daily_rollups_update"))
+        _create_rollup_triggers(conn)
+
+
+def add_merchant_key_index(conn: Connection):
+    """Keep merchant_keys and its FTS5 trigram index filled through triggers.
+
+    The table itself comes from the model; it is filled from the existing
+    transactions the first time the triggers are installed.
+    """
+    installed = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'merchant_keys_fts'"
+    )).first()
+    if not installed:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE merchant_keys_fts USING fts5("
+            "key, content='merchant_keys', content_rowid='id', tokenize='trigram')"
+        ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS merchant_keys_fts_insert AFTER INSERT ON merchant_keys BEGIN"
+        " INSERT INTO merchant_keys_fts (rowid, key) VALUES (new.id, new.key);"
+        " END"
+    ))
+    for event, columns in (("insert", "INSERT"), ("update", "UPDATE OF merchant_key")):
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS merchant_keys_{event} AFTER {columns} ON transactions"
+            " WHEN new.merchant_key IS NOT NULL BEGIN"
+            " INSERT OR IGNORE INTO merchant_keys (key) VALUES (new.merchant_key);"
+            " END"
+        ))
+    if not installed:
+        conn.execute(text(
+            "INSERT OR IGNORE INTO merchant_keys (key)"
+            " SELECT DISTINCT merchant_key FROM transactions WHERE merchant_key IS NOT NULL"
+        ))
+
+
+def refresh_statistics(conn: Connection):
+    """Refresh the query planner's table statistics.
+
+    The grouping-first indexes are only skip-scanned for a date range once
+    the statistics show few distinct leading values. analysis_limit samples
+    each index, so this stays fast on large databases.
+    """
+    conn.execute(text(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}"))
+    conn.execute(text("ANALYZE"))
+
+
+# Upgrade steps in order. Each one must be safe to run again on a database
+# it has already upgraded.
+UPGRADE_STEPS = [
+    add_merchant_key,
+    add_search_index,
+    add_category_locked,
+    add_daily_rollups,
+    add_date_buckets,
+    add_month_snapshots,
+    add_rollup_pause,
+    add_merchant_key_index,
+    refresh_statistics,
+]
+
+
+def upgrade_database(engine: Engine = default_engine):
+    """Bring an existing database up to the current schema.
+
+    Safe to run on every start: missing tables are created and each upgrade
+    step checks whether it has already been applied.
+    """
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for step in UPGRADE_STEPS:
+            step(conn)
@@ -1,10 +1,22 @@
 import enum
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, Date, DateTime, Enum, Integer, String
+from sqlalchemy import Boolean, Column, Date, DateTime, Enum, Index, Integer, String, text
 from sqlalchemy import ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from .database import Base
+from ..core.matching import normalize_keyword
+
+def merchant_key(merchant):
+    """Normalized merchant name used for rule matching, grouping and search."""
+    return normalize_keyword(merchant) if merchant is not None else None
+
+def _merchant_key_default(context):
+    return merchant_key(context.get_current_parameters().get("merchant"))
+
+def month_bucket(day):
+    """Calendar month of a date as "YYYY-MM"."""
+    return day.strftime("%Y-%m") if day is not None else None
 
 class SourceType(enum.Enum):
     paypay = "paypay"
@@ -18,13 +30,59 @@ class Transaction(Base):
     date = Column(Date, nullable=False)
     amount = Column(Integer, nullable=False)
     merchant = Column(String, nullable=True)
+    merchant_key = Column(String, nullable=True, index=True, default=_merchant_key_default)
     description = Column(String, nullable=True)
     source = Column(String, nullable=False)
     source_type = Column(Enum(SourceType), nullable=False)
     record_hash = Column(String, unique=True, index=True, nullable=False)
     category = Column(String, nullable=False, default="Uncategorized")
+    # Set when the category was chosen by hand; rules then leave it alone
+    category_locked = Column(Boolean, nullable=False, default=False, server_default=text("0"))
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Listing order of the transactions page. Dashboard aggregates read
+    # daily_rollups and month_snapshots, so no further indexes slow imports.
+    __table_args__ = (
+        Index("ix_transactions_date_id", date.desc(), id),
+    )
+
+    @validates("merchant")
+    def _update_merchant_key(self, name, value):
+        # Edits keep the key in step. A column onupdate would not do: it
+        # only sees the SET values, so a category edit would clear the key.
+        self.merchant_key = merchant_key(value)
+        return value
+
+
+class ParsedTransaction:
+    """A transaction row produced by a parser, before it is stored.
+
+    A plain __slots__ object carrying the insertable Transaction columns, so the
+    import pipeline does not pay for ORM instrumentation and session state on
+    every parsed row. Use to_model() where a mapped Transaction is needed.
+    """
+
+    __slots__ = (
+        "date", "amount", "merchant", "merchant_key", "description", "source", "source_type", "record_hash", "category"
+    )
+
+    def __init__(self, date, amount, merchant, description, source, source_type, record_hash, category="Uncategorized"):
+        self.date = date
+        self.amount = amount
+        self.merchant = merchant
+        self.merchant_key = merchant_key(merchant)
+        self.description = description
+        self.source = source
+        self.source_type = source_type
+        self.record_hash = record_hash
+        self.category = category
+
+    def to_model(self) -> Transaction:
+        return Transaction(**{name: getattr(self, name) for name in self.__slots__})
+
+    def __repr__(self):
+        return f"ParsedTransaction(date={self.date!r}, amount={self.amount!r}, merchant={self.merchant!r}, record_hash={self.record_hash!r})"
+
 
 class CategoryRule(Base):
     __tablename__ = "category_rules"
@@ -33,3 +91,87 @@ class CategoryRule(Base):
     keyword = Column(String, nullable=False, index=True)
     category = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DataVersion(Base):
+    """A counter bumped whenever the named data set changes, for cache invalidation."""
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class DailyRollup(Base):
+    """Spending per day, category, source and merchant, maintained by triggers on transactions.
+
+    Transactions without a merchant are rolled up under an empty merchant_key.
+    """
+    __tablename__ = "daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    category = Column(String, primary_key=True)
+    source = Column(String, primary_key=True)
+    merchant_key = Column(String, primary_key=True)
+    # One spelling of the merchant, for display
+    merchant = Column(String, nullable=True)
+    amount = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+    # Buckets of day, as on Transaction
+    month = Column(String, nullable=True)
+    week = Column(String, nullable=True)
+
+    # One covering index per dashboard aggregation, grouping columns first
+    __table_args__ = (
+        Index("ix_daily_rollups_month_week_category", month, week, category, day, amount),
+        Index("ix_daily_rollups_category_day", category, day, amount),
+        Index("ix_daily_rollups_source_day", source, day, amount),
+        Index("ix_daily_rollups_merchant_day", merchant_key, merchant, day, amount, count),
+        {"sqlite_with_rowid": False},
+    )
+
+class MerchantKey(Base):
+    """Every distinct merchant_key stored on transactions, filled by a trigger.
+
+    merchant_keys_fts indexes these keys by trigram, so rule previews and
+    keyword recategorization find the keys containing a keyword without
+    scanning transactions. Keys are never removed; one whose transactions
+    are all deleted simply matches no rows. The integer id survives VACUUM.
+    """
+    __tablename__ = "merchant_keys"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String, nullable=False, unique=True)
+
+class RollupPause(Base):
+    """While a row exists, updates to transactions leave daily_rollups alone.
+
+    Bulk category updates add one, update many rows and rebuild the rollup
+    rows they touched in a single pass, then remove it again, all inside
+    one write transaction, so other connections never see it.
+    """
+    __tablename__ = "rollup_pauses"
+
+    name = Column(String, primary_key=True)
+
+class MonthSnapshot(Base):
+    """Frozen dashboard aggregates of one closed month, built from daily_rollups.
+
+    kind is week (label = category), source, category or merchant (label =
+    merchant_key); a total row marks the month as snapshotted even when it
+    has no spending. Triggers on daily_rollups delete a month's rows when
+    its data changes.
+    """
+    __tablename__ = "month_snapshots"
+    __table_args__ = (
+        # Covering, so totals over many months are summed per label in index order
+        Index("ix_month_snapshots_kind_label", "kind", "label", "month", "merchant", "amount", "count"),
+        {"sqlite_with_rowid": False},
+    )
+
+    month = Column(String, primary_key=True)
+    kind = Column(String, primary_key=True)
+    # Empty except for week rows
+    week = Column(String, primary_key=True, default="")
+    label = Column(String, primary_key=True)
+    merchant = Column(String, nullable=True)
+    amount = Column(Integer, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
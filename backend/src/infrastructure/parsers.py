@@ -1,70 +1,255 @@
-import pandas as pd
 import hashlib
 import io
 import csv
+import re
 from abc import ABC, abstractmethod
-from typing import List
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator, List, Optional, Tuple, Type
 from datetime import datetime
-from .models import Transaction, SourceType
-from .repositories import TransactionRepository
+from .models import ParsedTransaction, SourceType
+
+# pandas is imported lazily, only when a large file is parsed, so processes
+# that never parse big statements do not pay for loading it
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Number of CSV rows parsed (and handed to the importer) at a time
+DEFAULT_BATCH_SIZE = 1000
+
+# Bytes from the start of a file that format detection looks at
+SNIFF_BYTES = 1000
+
+# Files at least this large are parsed column-wise with pandas; smaller ones
+# are streamed row by row through the csv module
+PANDAS_MIN_BYTES = 4 * 1024 * 1024
+
+# Cells pandas reads as missing unless told otherwise (its default na_values)
+PANDAS_NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+})
+
+def _remaining_bytes(stream: BinaryIO) -> Optional[int]:
+    """Bytes left in a seekable stream, or None when the size cannot be told."""
+    try:
+        position = stream.tell()
+        end = stream.seek(0, io.SEEK_END)
+        stream.seek(position)
+        return end - position
+    except (AttributeError, OSError):
+        return None
+
+def _text_stream(stream: BinaryIO, encoding: str, newline: Optional[str] = None) -> io.TextIOWrapper:
+    """Decode a binary stream; detach() the wrapper afterwards to leave the stream open.
+
+    Before Python 3.11 SpooledTemporaryFile, which holds Starlette uploads, has
+    no readable() for TextIOWrapper to call, so the file it spools to is
+    wrapped instead. Both share the same position.
+    """
+    if not hasattr(stream, 'readable') and hasattr(stream, '_file'):
+        stream = stream._file
+    return io.TextIOWrapper(stream, encoding=encoding, newline=newline)
+
+def _batched(transactions: Iterable[Optional[ParsedTransaction]], batch_size: int) -> Iterator[List[ParsedTransaction]]:
+    """Group parsed rows into lists of at most batch_size, dropping skipped (None) rows."""
+    batch = []
+    for t in transactions:
+        if t is None:
+            continue
+        batch.append(t)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _cell(row: List[str], index: Optional[int], default=None) -> Optional[str]:
+    """A csv cell by position; empty or missing cells are None (pandas reads them as NaN)."""
+    if index is None:
+        return default
+    if index < len(row) and row[index] != '':
+        return row[index]
+    return None
+
+def _values(values: "pd.Series") -> list:
+    """Column values as a list with missing cells as None, matching _cell()."""
+    return values.astype(object).where(values.notna(), None).tolist()
 
 class BaseParser(ABC):
+    # Encoding of the files this parser reads
+    encoding: str = 'utf-8'
+
+    # Byte strings (already encoded) that identify the format when they
+    # appear in the header line of a file
+    signatures: Tuple[bytes, ...] = ()
+
+    @classmethod
+    def sniff(cls, head: bytes) -> float:
+        """Confidence in [0, 1] that a file starting with head is in this format.
+
+        Works on raw bytes, so no decoding is needed to detect a format. A
+        signature in the header line is a strong match; one elsewhere in the
+        head is a weak match.
+        """
+        header_line = head.split(b'\n', 1)[0]
+        if any(signature in header_line for signature in cls.signatures):
+            return 1.0
+        if any(signature in head for signature in cls.signatures):
+            return 0.5
+        return 0.0
+
+    def iter_batches(self, stream: BinaryIO, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[ParsedTransaction]]:
+        """Yield the parsed transactions of a binary stream in batches of at most batch_size.
+
+        Both parse paths produce the same transactions; pandas is only worth
+        its import and DataFrame overhead for large files.
+        """
+        size = _remaining_bytes(stream)
+        if size is not None and size >= PANDAS_MIN_BYTES:
+            return self._iter_frame_batches(stream, batch_size)
+        return self._iter_csv_batches(stream, batch_size)
+
     @abstractmethod
-    def parse(self, file_content: bytes, filename: str) -> List[Transaction]:
-        pass
+    def _iter_csv_batches(self, stream: BinaryIO, batch_size: int) -> Iterator[List[ParsedTransaction]]:
+        """Stream the file through the csv module without building a DataFrame."""
 
-class PayPayParser(BaseParser):
-    def parse(self, file_content: bytes, filename: str) -> List[Transaction]:
-        # PayPay is UTF-8
-        # Force all columns to string to prevent ID conversion
-        df = pd.read_csv(io.BytesIO(file_content), encoding='utf-8', dtype=str)
+    def _iter_frame_batches(self, stream: BinaryIO, batch_size: int) -> Iterator[List[ParsedTransaction]]:
+        # Formats without a pandas path parse every file with the csv module
+        return self._iter_csv_batches(stream, batch_size)
 
+    def parse(self, file_content: bytes, filename: str) -> List[ParsedTransaction]:
         transactions = []
-        for _, row in df.iterrows():
-            # Skip invalid rows if necessary
-            if pd.isna(row.get('Transaction ID')):
-                continue
-
-            # Only include Payment or Refund transaction types
-            transaction_type = row.get('Transaction Type', '')
-            if transaction_type not in ['Payment', 'Refund']:
-                continue
-
-            # Parse Date
-            date_str = row['Date & Time']
-            # Format: 2025/11/07 18:58:48
-            try:
-                dt = datetime.strptime(date_str, '%Y/%m/%d %H:%M:%S')
-                date_obj = dt.date()
-            except ValueError:
-                continue
-
-            # Amount Logic
-            # Amount Outgoing (Yen) or Amount Incoming (Yen)
-            amount = 0
-            outgoing = row.get('Amount Outgoing (Yen)', '-')
-            incoming = row.get('Amount Incoming (Yen)', '-')
-
-            if outgoing != '-':
-                # Remove commas
-                amount = int(str(outgoing).replace(',', ''))
-            elif incoming != '-':
-                # Income is negative expense in our logic? Or separate?
-                # Spec: "positive for expense/outgoing, negative for income/refund"
-                amount = -1 * int(str(incoming).replace(',', ''))
-
-            # Merchant
-            merchant = row.get('Business Name', '')
-            description = row.get('Transaction Details', '')
-
-            # Source
-            source = row.get('Method', 'PayPay')
-
-            # Hash
-            # Use Transaction ID directly
-            record_hash = str(row['Transaction ID'])
-
-            t = Transaction(
+        for batch in self.iter_batches(io.BytesIO(file_content)):
+            transactions.extend(batch)
+        return transactions
+
+# Parsers tried by format detection, in registration order
+PARSER_REGISTRY: List[Type[BaseParser]] = []
+
+def register_parser(parser_cls: Type[BaseParser]) -> Type[BaseParser]:
+    """Class decorator adding a parser to format detection."""
+    PARSER_REGISTRY.append(parser_cls)
+    return parser_cls
+
+@register_parser
+class PayPayParser(BaseParser):
+    # PayPay is UTF-8, sometimes with a byte order mark
+    encoding = 'utf-8-sig'
+    signatures = (b'Transaction ID', '取引番号'.encode('utf-8'))
+
+    # Only these transaction types count as spending
+    TRANSACTION_TYPES = ['Payment', 'Refund']
+    DATE_FORMAT = '%Y/%m/%d %H:%M:%S'
+
+    def _iter_csv_batches(self, stream: BinaryIO, batch_size: int) -> Iterator[List[ParsedTransaction]]:
+        text_io = _text_stream(stream, self.encoding, newline='')
+        try:
+            reader = csv.reader(text_io)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError("No columns to parse from file")
+
+            # First occurrence wins for repeated column names, as in pandas
+            index = {}
+            for i, name in enumerate(header):
+                index.setdefault(name, i)
+            if 'Transaction ID' not in index or 'Transaction Type' not in index:
+                return
+
+            yield from _batched((self._parse_row(row, index) for row in reader if row), batch_size)
+        finally:
+            # Leave the caller's stream open
+            text_io.detach()
+
+    def _parse_row(self, row: List[str], index: dict) -> Optional[ParsedTransaction]:
+        # Same skip rules and values as _parse_frame, one row at a time
+        record_hash = _cell(row, index['Transaction ID'])
+        if record_hash is None:
+            return None
+        if _cell(row, index['Transaction Type']) not in self.TRANSACTION_TYPES:
+            return None
+
+        try:
+            date_obj = datetime.strptime(_cell(row, index['Date & Time']), self.DATE_FORMAT).date()
+        except (TypeError, ValueError):
+            return None
+
+        outgoing = _cell(row, index.get('Amount Outgoing (Yen)'), '-')
+        incoming = _cell(row, index.get('Amount Incoming (Yen)'), '-')
+        amount = 0
+        if outgoing != '-':
+            amount = int(str(outgoing).replace(',', ''))
+        elif incoming != '-':
+            amount = -1 * int(str(incoming).replace(',', ''))
+
+        return ParsedTransaction(
+            date=date_obj,
+            amount=amount,
+            merchant=_cell(row, index.get('Business Name'), ''),
+            description=_cell(row, index.get('Transaction Details'), ''),
+            source=_cell(row, index.get('Method'), 'PayPay'),
+            source_type=SourceType.paypay,
+            record_hash=record_hash,
+            category="Uncategorized"  # Default category
+        )
+
+    def _iter_frame_batches(self, stream: BinaryIO, batch_size: int) -> Iterator[List[ParsedTransaction]]:
+        import pandas as pd
+
+        # Force all columns to string to prevent ID conversion; only empty
+        # cells count as missing, as in the csv path
+        with pd.read_csv(
+            stream, encoding=self.encoding, dtype=str, keep_default_na=False, na_values=[''], chunksize=batch_size
+        ) as reader:
+            for df in reader:
+                transactions = self._parse_frame(df)
+                if transactions:
+                    yield transactions
+
+    def _parse_frame(self, df: "pd.DataFrame") -> List[ParsedTransaction]:
+        import pandas as pd
+
+        # Work column-wise over the whole frame instead of row by row.
+        # Rows without a Transaction ID or with a type other than
+        # Payment/Refund are skipped, as are rows whose date does not parse.
+        if 'Transaction ID' not in df.columns or 'Transaction Type' not in df.columns:
+            return []
+
+        mask = df['Transaction ID'].notna() & df['Transaction Type'].isin(self.TRANSACTION_TYPES)
+        df = df[mask]
+        if df.empty:
+            return []
+
+        # Format: 2025/11/07 18:58:48
+        dates = pd.to_datetime(df['Date & Time'], format=self.DATE_FORMAT, errors='coerce')
+        valid = dates.notna()
+        df = df[valid]
+        dates = dates[valid]
+        if df.empty:
+            return []
+
+        # Amount Logic
+        # Spec: "positive for expense/outgoing, negative for income/refund"
+        outgoing = self._column(df, 'Amount Outgoing (Yen)', '-')
+        incoming = self._column(df, 'Amount Incoming (Yen)', '-')
+        has_outgoing = outgoing != '-'
+        has_incoming = ~has_outgoing & (incoming != '-')
+
+        amounts = pd.Series(0, index=df.index, dtype='int64')
+        amounts[has_outgoing] = self._to_int(outgoing[has_outgoing])
+        amounts[has_incoming] = -self._to_int(incoming[has_incoming])
+
+        columns = zip(
+            dates.dt.date.tolist(),
+            amounts.tolist(),
+            _values(self._column(df, 'Business Name', '')),
+            _values(self._column(df, 'Transaction Details', '')),
+            _values(self._column(df, 'Method', 'PayPay')),
+            # Use Transaction ID directly as the hash
+            df['Transaction ID'].astype(str).tolist(),
+        )
+
+        return [
+            ParsedTransaction(
                 date=date_obj,
                 amount=amount,
                 merchant=merchant,
@@ -74,21 +259,121 @@ class PayPayParser(BaseParser):
                 record_hash=record_hash,
                 category="Uncategorized"  # Default category
             )
+            for date_obj, amount, merchant, description, source, record_hash in columns
+        ]
 
-            # Apply auto-categorization
-            # Note: This requires a database session, which will be handled in the API layer
-            transactions.append(t)
+    @staticmethod
+    def _column(df: "pd.DataFrame", name: str, default: str) -> "pd.Series":
+        import pandas as pd
 
-        return transactions
+        if name in df.columns:
+            return df[name]
+        return pd.Series(default, index=df.index, dtype=object)
+
+    @staticmethod
+    def _to_int(values: "pd.Series") -> "pd.Series":
+        # Remove thousands separators; raises ValueError on malformed amounts
+        return values.astype(str).str.replace(',', '', regex=False).astype('int64')
 
+@register_parser
 class SMBCParser(BaseParser):
-    def parse(self, file_content: bytes, filename: str) -> List[Transaction]:
+    encoding = 'cp932'
+    # The card header line names the card, e.g. "Ｏｌｉｖｅゴールド"
+    signatures = ('Ｏｌｉｖｅ'.encode('cp932'), 'クレジット'.encode('cp932'), b'Card')
+    DATE_FORMAT = '%Y/%m/%d'
+
+    # Data rows start with the usage date, e.g. "2025/11/28,"
+    DATA_ROW = re.compile(rb'\d{4}/\d{1,2}/\d{1,2},')
+
+    # Amounts (after removing commas) that are not plain integers become 0
+    INTEGER = re.compile(r'\s*[+-]?\d+\s*')
+
+    # Cells pandas' type inference reads as floats (INTEGER cells included)
+    FLOAT = re.compile(r'\s*[+-]?(\d+\.?\d*(e[+-]?\d+)?|\.\d+(e[+-]?\d+)?|inf|infinity)\s*', re.IGNORECASE)
+
+    # Merchant and amount, the hashed columns besides the date
+    HASH_COLUMNS = (1, 5)
+
+    @classmethod
+    def sniff(cls, head: bytes) -> float:
+        confidence = super().sniff(head)
+        if not confidence:
+            return 0.0
+        # A card header line followed by a dated data row is the full layout
+        lines = head.split(b'\n', 2)
+        if len(lines) > 1 and cls.DATA_ROW.match(lines[1]):
+            return min(1.0, confidence + 0.25)
+        return confidence * 0.8
+
+    def _iter_csv_batches(self, stream: BinaryIO, batch_size: int) -> Iterator[List[ParsedTransaction]]:
+        kinds = self._hash_column_kinds(stream)
         # SMBC is CP932 / Shift-JIS
-        # Read first line for Source Info
-        text_io = io.TextIOWrapper(io.BytesIO(file_content), encoding='cp932')
-        header_line = text_io.readline()
-        text_io.seek(0)
-        
+        text_io = _text_stream(stream, self.encoding, newline='')
+        try:
+            source_name = self._source_name(text_io.readline())
+
+            # No Header in file, columns by index
+            # 0: Date, 1: Merchant, 5: Amount
+            reader = csv.reader(text_io)
+            yield from _batched((self._parse_row(row, source_name, kinds) for row in reader if row), batch_size)
+        finally:
+            # Leave the caller's stream open
+            text_io.detach()
+
+    def _parse_row(self, row: List[str], source_name: str, kinds: Tuple[str, str]) -> Optional[ParsedTransaction]:
+        # Same rules as _parse_frame, one row at a time; empty cells read as 'nan'
+        date_str = _cell(row, 0) or 'nan'
+        merchant = _cell(row, 1) or 'nan'
+
+        try:
+            # Date format: 2025/11/28
+            date_obj = datetime.strptime(date_str, self.DATE_FORMAT).date()
+        except ValueError:
+            return None
+
+        amount_str = (_cell(row, 5) or 'nan').replace(',', '')
+        amount = int(amount_str) if self.INTEGER.fullmatch(amount_str) else 0
+
+        # Synthetic Hash
+        # SHA256(YYYYMMDD + Merchant + Amount)
+        hash_base = self._hash_base(date_str, _cell(row, 1), _cell(row, 5), kinds).encode('utf-8')
+
+        return ParsedTransaction(
+            date=date_obj,
+            amount=amount,
+            merchant=merchant,
+            description="Credit Card Payment",
+            source=source_name,
+            source_type=SourceType.smbc,
+            record_hash=hashlib.sha256(hash_base).hexdigest(),
+            category="Uncategorized"  # Default category
+        )
+
+    def _iter_frame_batches(self, stream: BinaryIO, batch_size: int) -> Iterator[List[ParsedTransaction]]:
+        import pandas as pd
+
+        kinds = self._hash_column_kinds(stream)
+        # Decode once: read the header line from the text stream, then hand
+        # the same stream (now positioned on the first data row) to pandas.
+        text_io = _text_stream(stream, self.encoding)
+        try:
+            source_name = self._source_name(text_io.readline())
+
+            # Read as text so every batch is parsed (and hashed) the same way
+            # regardless of where the batch boundaries fall.
+            with pd.read_csv(
+                text_io, header=None, dtype=str, keep_default_na=False, na_values=[''], chunksize=batch_size
+            ) as reader:
+                for df in reader:
+                    transactions = self._parse_frame(df, source_name, kinds)
+                    if transactions:
+                        yield transactions
+        finally:
+            # Leave the caller's stream open
+            text_io.detach()
+
+    @staticmethod
+    def _source_name(header_line: str) -> str:
         # Parse Header Line manually
         # e.g., "User Name","4980-00**...","Olive Gold"
         # We can use csv reader for just the first line
@@ -97,41 +382,43 @@ class SMBCParser(BaseParser):
             header_row = next(reader)
             masked_num = header_row[1]
             card_name = header_row[2]
-            source_name = f"{card_name} ({masked_num})"
-        except:
-            source_name = "SMBC Card"
-
-        # Read Data - No Header in file, columns by index
-        # 0: Date, 1: Merchant, 5: Amount
-        # Note: pandas read_csv with header=None
-        # We need to skip row 0 (metadata)
-        df = pd.read_csv(io.BytesIO(file_content), encoding='cp932', header=None, skiprows=1)
-        
-        transactions = []
-        for _, row in df.iterrows():
-            # row is a Series with integer index
-            date_str = str(row[0])
-            merchant = str(row[1])
-            amount_raw = row[5]
-            
-            try:
-                # Date format: 2025/11/28
-                dt = datetime.strptime(date_str, '%Y/%m/%d')
-                date_obj = dt.date()
-            except ValueError:
-                continue
-
-            try:
-                amount = int(str(amount_raw).replace(',', ''))
-            except:
-                amount = 0
-
-            # Synthetic Hash
-            # SHA256(YYYYMMDD + Merchant + Amount)
-            hash_base = f"{date_str}{merchant}{amount}".encode('utf-8')
-            record_hash = hashlib.sha256(hash_base).hexdigest()
-
-            t = Transaction(
+            return f"{card_name} ({masked_num})"
+        except (StopIteration, IndexError, csv.Error):
+            return "SMBC Card"
+
+    def _parse_frame(self, df: "pd.DataFrame", source_name: str, kinds: Tuple[str, str]) -> List[ParsedTransaction]:
+        import pandas as pd
+
+        if df.empty:
+            return []
+
+        date_strs = self._as_str(df[0])
+        merchants = self._as_str(df[1])
+
+        # Date format: 2025/11/28; rows that do not parse are skipped
+        dates = pd.to_datetime(date_strs, format=self.DATE_FORMAT, errors='coerce')
+        valid = dates.notna()
+        date_strs, merchants, dates = date_strs[valid], merchants[valid], dates[valid]
+        if dates.empty:
+            return []
+
+        # Amounts that are not plain integers (after removing commas) become 0
+        amount_strs = self._as_str(df.loc[valid, 5]).str.replace(',', '', regex=False)
+        is_int = amount_strs.str.fullmatch(self.INTEGER.pattern).fillna(False).astype(bool)
+        amounts = pd.Series(0, index=amount_strs.index, dtype='int64')
+        amounts[is_int] = amount_strs[is_int].astype('int64')
+
+        # Synthetic Hash
+        # SHA256(YYYYMMDD + Merchant + Amount)
+        hash_bases = zip(date_strs.tolist(), _values(df.loc[valid, 1]), _values(df.loc[valid, 5]))
+        record_hashes = [
+            hashlib.sha256(self._hash_base(date_str, merchant, amount, kinds).encode('utf-8')).hexdigest()
+            for date_str, merchant, amount in hash_bases
+        ]
+
+        columns = zip(dates.dt.date.tolist(), amounts.tolist(), merchants.tolist(), record_hashes)
+        return [
+            ParsedTransaction(
                 date=date_obj,
                 amount=amount,
                 merchant=merchant,
@@ -141,72 +428,148 @@ class SMBCParser(BaseParser):
                 record_hash=record_hash,
                 category="Uncategorized"  # Default category
             )
-            transactions.append(t)
-            
-        return transactions
+            for date_obj, amount, merchant, record_hash in columns
+        ]
+
+    @staticmethod
+    def _as_str(values: "pd.Series") -> "pd.Series":
+        # Same text as str(value) per cell, including 'nan' for empty cells
+        return values.astype(str).fillna('nan')
 
+    def _hash_column_kinds(self, stream: BinaryIO) -> Tuple[str, str]:
+        """How pandas typed the merchant and amount columns: 'int', 'float' or 'object'.
+
+        record_hash must not change from when whole files were read with
+        pd.read_csv defaults, or re-uploaded statements would be imported
+        twice. Those defaults typed each column over the whole file, and the
+        type changed the hashed text (see _hash_base). Reads the stream to
+        the end, then rewinds it to where it was.
+        """
+        position = stream.tell()
+        text_io = _text_stream(stream, self.encoding, newline='')
+        missing = [False] * len(self.HASH_COLUMNS)
+        ints = [True] * len(self.HASH_COLUMNS)
+        floats = [True] * len(self.HASH_COLUMNS)
+        try:
+            text_io.readline()
+            for row in csv.reader(text_io):
+                if not row:
+                    continue
+                for i, index in enumerate(self.HASH_COLUMNS):
+                    value = row[index] if index < len(row) else ''
+                    if value in PANDAS_NA_VALUES:
+                        missing[i] = True
+                    elif floats[i]:
+                        ints[i] = ints[i] and bool(self.INTEGER.fullmatch(value))
+                        floats[i] = ints[i] or bool(self.FLOAT.fullmatch(value))
+                # Text columns stay text, whatever follows
+                if not any(floats):
+                    break
+        finally:
+            text_io.detach()
+        stream.seek(position)
+        # A missing cell turns an integer column into floats
+        return tuple(
+            'int' if is_int and not has_missing else 'float' if is_float else 'object'
+            for has_missing, is_int, is_float in zip(missing, ints, floats)
+        )
+
+    @staticmethod
+    def _hash_base(date_str: str, merchant: Optional[str], amount: Optional[str], kinds: Tuple[str, str]) -> str:
+        """The text a row's record_hash is computed from, as the pandas parser built it.
+
+        Cells are hashed as str() of the value pandas read: 'nan' when
+        missing (pandas' NA strings such as "NA" included), and integer or
+        float columns in their parsed form. The amount is the int() of that
+        text without commas, or 0 when it is not one, as for any float
+        column.
+        """
+        texts = []
+        for value, kind in zip((merchant, amount), kinds):
+            if value is None or value in PANDAS_NA_VALUES:
+                value = 'nan'
+            elif kind == 'int':
+                value = str(int(value))
+            elif kind == 'float':
+                value = str(float(value))
+            texts.append(value)
+        merchant_text, amount_text = texts
+        try:
+            amount_value = int(amount_text.replace(',', ''))
+        except ValueError:
+            amount_value = 0
+        return f"{date_str}{merchant_text}{amount_value}"
+
+@register_parser
 class TemplateParser(BaseParser):
-    def parse(self, file_content: bytes, filename: str) -> List[Transaction]:
+    encoding = 'utf-8-sig'
+    signatures = (b'date,amount,description',)
+
+    # Manual templates are small, so they are always read with the csv module
+    def _iter_csv_batches(self, stream: BinaryIO, batch_size: int) -> Iterator[List[ParsedTransaction]]:
         # Standard format: date,amount,description,category
-        df = pd.read_csv(io.BytesIO(file_content), encoding='utf-8')
-        
-        transactions = []
-        for _, row in df.iterrows():
-            date_str = row['date']
-            try:
-                dt = datetime.strptime(date_str, '%Y-%m-%d')
-                date_obj = dt.date()
-            except:
-                continue
-                
-            amount = int(row['amount'])
-            desc = row.get('description', '')
-            cat = row.get('category', '')
-            
-            # Hash
-            hash_base = f"{date_str}{desc}{amount}".encode('utf-8')
-            record_hash = hashlib.sha256(hash_base).hexdigest()
-            
-            t = Transaction(
-                date=date_obj,
-                amount=amount,
-                merchant=desc, # Use description as merchant for manual
-                description=desc,
-                category=cat,
-                source="Manual Entry",
-                source_type=SourceType.manual,
-                record_hash=record_hash
-            )
-            transactions.append(t)
-        return transactions
+        text_io = _text_stream(stream, self.encoding, newline='')
+        try:
+            reader = csv.reader(text_io)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError("No columns to parse from file")
+
+            index = {}
+            for i, name in enumerate(header):
+                index.setdefault(name, i)
+
+            yield from _batched((self._parse_row(row, index) for row in reader if row), batch_size)
+        finally:
+            # Leave the caller's stream open
+            text_io.detach()
+
+    def _parse_row(self, row: List[str], index: dict) -> Optional[ParsedTransaction]:
+        date_str = _cell(row, index['date'])
+        try:
+            dt = datetime.strptime(date_str, '%Y-%m-%d')
+            date_obj = dt.date()
+        except (TypeError, ValueError):
+            return None
+
+        amount = int(_cell(row, index['amount']) or '')
+        desc = _cell(row, index.get('description'), '')
+        cat = _cell(row, index.get('category'), '')
+
+        # Hash
+        # Empty descriptions hash as 'nan', as they did when read through pandas
+        hash_base = f"{date_str}{'nan' if desc is None else desc}{amount}".encode('utf-8')
+        record_hash = hashlib.sha256(hash_base).hexdigest()
+
+        return ParsedTransaction(
+            date=date_obj,
+            amount=amount,
+            merchant=desc, # Use description as merchant for manual
+            description=desc,
+            category=cat,
+            source="Manual Entry",
+            source_type=SourceType.manual,
+            record_hash=record_hash
+        )
+
+def detect_parsers(content: bytes) -> List[Tuple[float, Type[BaseParser]]]:
+    """Rank the registered parsers by how confidently they recognize content.
+
+    Only the first SNIFF_BYTES bytes are looked at, so detection costs the same
+    for any file size. Parsers that do not recognize the file are left out; on
+    equal confidence the parser registered first wins.
+    """
+    head = content[:SNIFF_BYTES]
+    matches = []
+    for parser_cls in PARSER_REGISTRY:
+        confidence = parser_cls.sniff(head)
+        if confidence > 0:
+            matches.append((confidence, parser_cls))
+    # sorted() is stable, so registration order breaks ties
+    return sorted(matches, key=lambda match: match[0], reverse=True)
 
 def get_parser(filename: str, content: bytes) -> BaseParser:
-    # Auto-detection logic
-    # Try to decode first few bytes as UTF-8 vs Shift-JIS?
-    # Or look for specific headers.
-    
-    # Simple Heuristic:
-    # 1. Try decoding as UTF-8. If it contains "Transaction ID" -> PayPay.
-    # 2. Try decoding as CP932. If it contains "SMBC" or similar -> SMBC.
-    
-    try:
-        utf8_head = content[:1000].decode('utf-8')
-        if "Transaction ID" in utf8_head or "取引番号" in utf8_head:
-            return PayPayParser()
-        if "date,amount,description" in utf8_head:
-            return TemplateParser()
-    except:
-        pass
-        
-    try:
-        # SMBC check
-        cp932_head = content[:1000].decode('cp932')
-        # Check for card number pattern or specific Japanese chars?
-        # The sample had "Ｏｌｉｖｅゴールド"
-        if "Ｏｌｉｖｅ" in cp932_head or "クレジット" in cp932_head or "Card" in cp932_head:
-             return SMBCParser()
-    except:
-        pass
-        
-    # Default/Fallback? Raise Error
-    raise ValueError("Unknown CSV format")
+    matches = detect_parsers(content)
+    if not matches:
+        raise ValueError("Unknown CSV format")
+    return matches[0][1]()
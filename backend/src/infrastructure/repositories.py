@@ -1,33 +1,469 @@
+import threading
+import weakref
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Iterable, Optional, Union
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import column, delete, func, extract, literal, literal_column, null, or_, select, table, union_all
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.sql import text
-from .models import Transaction, CategoryRule
-from ..domain.schemas import MonthlyWeeklyTrend, WeeklyTrendData
+from .models import Transaction, CategoryRule, DailyRollup, DataVersion, MerchantKey, MonthSnapshot, ParsedTransaction, RollupPause, month_bucket
+from ..core.matching import KeywordMatcher, normalize_keyword
+from ..domain.schemas import DashboardStats, MonthlyWeeklyTrend, WeeklyTrendData
+
+# SQLite's default cap on bound parameters per statement (SQLITE_MAX_VARIABLE_NUMBER)
+SQLITE_MAX_VARIABLES = 999
+
+# Rows written per INSERT statement (and per commit) by bulk_create
+BULK_INSERT_BATCH_SIZE = 1000
+
+# Columns a parsed transaction carries; id and created_at come from column defaults
+TRANSACTION_INSERT_COLUMNS = ParsedTransaction.__slots__
+
+# Rows read (and updated, then committed) per chunk by recategorize
+RECATEGORIZE_CHUNK_SIZE = 5000
+
+# Shortest query the trigram index can answer; shorter ones fall back to LIKE
+SEARCH_MIN_TRIGRAM_LENGTH = 3
+
+# Merchants listed in a rule preview, most transactions first
+PREVIEW_SAMPLE_SIZE = 20
+
+# Merchants listed on the dashboard, highest spending first
+TOP_MERCHANTS_LIMIT = 10
+
+# data_versions entry bumped whenever category rules change
+CATEGORY_RULES_VERSION = "category_rules"
+
+# data_versions entry bumped by every write to transactions
+TRANSACTIONS_VERSION = "transactions"
+
+# Most recent months, the current one included, aggregated live on the dashboard;
+# statements for a month keep arriving during the next one
+SNAPSHOT_OPEN_MONTHS = 2
+
+# Dashboard results kept per database, one per (start, end, version) key
+STATS_CACHE_SIZE = 32
+
+# Compiled category rules per database engine, as (rules version, matcher).
+# Every process keeps its own copy and recompiles when the stored version moves.
+_matcher_cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_matcher_cache_lock = threading.Lock()
+
+# Dashboard results per database engine, least recently used first
+_stats_cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_stats_cache_lock = threading.Lock()
+
+def _month_start(day: date, months: int = 0) -> date:
+    """First day of the month `months` months after (or before) day's month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _months_between(first: date, last: date) -> Iterable[date]:
+    """First days of the months from first's month through last's month."""
+    month = _month_start(first)
+    while month <= last:
+        yield month
+        month = _month_start(month, 1)
+
+
+def _add_range(ranges: list, first: date, last: date) -> None:
+    """Append (first, last) to ranges, extending the last range when they touch."""
+    if ranges and ranges[-1][1] + timedelta(days=1) == first:
+        ranges[-1] = (ranges[-1][0], last)
+    else:
+        ranges.append((first, last))
+
 
 class TransactionRepository:
     @staticmethod
-    def create(session: Session, transaction: Transaction) -> Transaction:
+    def create(session: Session, transaction: Union[Transaction, ParsedTransaction]) -> Transaction:
+        if isinstance(transaction, ParsedTransaction):
+            transaction = transaction.to_model()
         session.add(transaction)
+        TransactionRepository.bump_data_version(session, TRANSACTIONS_VERSION)
         session.commit()
         session.refresh(transaction)
         return transaction
 
+    @staticmethod
+    def bulk_create(
+        session: Session,
+        transactions: Iterable[ParsedTransaction],
+        batch_size: int = BULK_INSERT_BATCH_SIZE
+    ) -> int:
+        """Insert parsed transactions with one executemany INSERT and one commit per batch.
+
+        Rows go straight from the records to the INSERT parameters; no ORM
+        objects are built, added to the session or refreshed afterwards.
+        Rows whose record_hash is already stored are left out, so imports
+        running side by side never fail on each other's rows. Returns the
+        number of rows inserted.
+        """
+        insert_stmt = sqlite_insert(Transaction.__table__).on_conflict_do_nothing(index_elements=["record_hash"])
+        inserted = 0
+        batch = []
+
+        def flush():
+            nonlocal inserted
+            inserted += session.execute(insert_stmt, batch).rowcount
+            TransactionRepository.bump_data_version(session, TRANSACTIONS_VERSION)
+            session.commit()
+
+        for t in transactions:
+            batch.append({column: getattr(t, column) for column in TRANSACTION_INSERT_COLUMNS})
+            if len(batch) >= batch_size:
+                flush()
+                batch = []
+
+        if batch:
+            flush()
+
+        return inserted
+
+    @staticmethod
+    def search(
+        session: Session,
+        query: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        source: Optional[str] = None,
+        category: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50
+    ) -> list[Transaction]:
+        """Find transactions whose merchant or description contains query.
+
+        Queries of three or more characters use the transactions_fts trigram
+        index and are ranked by bm25, best match first; shorter ones fall
+        back to a LIKE scan, newest first. Matching ignores ASCII case.
+        """
+        results = session.query(Transaction)
+        if len(query) >= SEARCH_MIN_TRIGRAM_LENGTH:
+            fts = table("transactions_fts", column("rowid"))
+            # A quoted FTS5 string matches the text as a substring, whatever it contains
+            phrase = '"' + query.replace('"', '""') + '"'
+            results = (
+                results
+                .join(fts, fts.c.rowid == literal_column("transactions.rowid"))
+                .filter(text("transactions_fts MATCH :phrase").bindparams(phrase=phrase))
+                .order_by(text("bm25(transactions_fts)"), Transaction.date.desc())
+            )
+        else:
+            results = results.filter(or_(
+                Transaction.merchant.contains(query, autoescape=True),
+                Transaction.description.contains(query, autoescape=True)
+            )).order_by(Transaction.date.desc())
+
+        if start_date:
+            results = results.filter(Transaction.date >= start_date)
+        if end_date:
+            results = results.filter(Transaction.date <= end_date)
+        if source:
+            results = results.filter(Transaction.source == source)
+        if category:
+            results = results.filter(Transaction.category == category)
+
+        return results.offset(skip).limit(limit).all()
+
     @staticmethod
     def get_by_hash(session: Session, record_hash: str) -> Transaction | None:
         return session.query(Transaction).filter(Transaction.record_hash == record_hash).first()
 
+    @staticmethod
+    def get_existing_hashes(session: Session, record_hashes: Iterable[str]) -> set[str]:
+        """Return the subset of record_hashes that are already stored."""
+        record_hashes = list(set(record_hashes))
+        existing = set()
+        # Chunk the IN (...) list to stay under SQLite's parameter limit
+        for i in range(0, len(record_hashes), SQLITE_MAX_VARIABLES):
+            chunk = record_hashes[i:i + SQLITE_MAX_VARIABLES]
+            rows = session.query(Transaction.record_hash).filter(Transaction.record_hash.in_(chunk)).all()
+            existing.update(row.record_hash for row in rows)
+        return existing
+
     @staticmethod
     def get_all(session: Session, skip: int = 0, limit: int = 100) -> list[Transaction]:
         return (
             session.query(Transaction)
-            .order_by(Transaction.date.desc())
+            .order_by(Transaction.date.desc(), Transaction.id)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
     @staticmethod
-    def get_weekly_spending_by_category(session: Session, start_date: str = None, end_date: str = None) -> list[MonthlyWeeklyTrend]:
+    def get_dashboard_stats(
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        merchant_limit: int = TOP_MERCHANTS_LIMIT,
+        today: Optional[date] = None
+    ) -> DashboardStats:
+        """Get weekly trends, source and category breakdowns and top merchants in one query.
+
+        Reads daily_rollups rather than transactions, so the cost follows the
+        number of (day, category, source, merchant) combinations in range, not
+        the number of transactions. Closed months (all but the last
+        SNAPSHOT_OPEN_MONTHS before today) that lie wholly inside the range
+        come from month_snapshots when built; the remaining days, including
+        closed months a write has just invalidated, are aggregated live. Both
+        feed one statement that merges them; percentages are then worked out
+        as get_source_breakdown and get_category_spending do.
+        """
+        # Separate subqueries, so each is a single lookup at one end of the primary key
+        first_day, last_day = session.execute(select(
+            select(func.min(DailyRollup.day)).scalar_subquery(),
+            select(func.max(DailyRollup.day)).scalar_subquery()
+        )).one()
+        if first_day is None:
+            return DashboardStats(weekly_trends=[], source_breakdown=[], top_merchants=[], category_spending=[])
+
+        # Only stored days are aggregated, but a month counts as whole when the range covers it
+        first_stored = max(start_date or first_day, first_day)
+        last_stored = min(end_date or last_day, last_day)
+        open_from = _month_start(today or date.today(), 1 - SNAPSHOT_OPEN_MONTHS)
+        closed = [
+            month for month in _months_between(first_stored, last_stored)
+            if (start_date is None or start_date <= month)
+            and (end_date is None or _month_start(month, 1) - timedelta(days=1) <= end_date)
+            and _month_start(month, 1) <= open_from
+        ]
+        # Read-only: closed months whose snapshot a write has dropped are aggregated live
+        built = TransactionRepository._snapshotted_months(session, closed)
+        snapshot_months, live_ranges = [], []
+        for month in _months_between(first_stored, last_stored):
+            if month_bucket(month) in built:
+                snapshot_months.append(month)
+            else:
+                month_end = _month_start(month, 1) - timedelta(days=1)
+                _add_range(live_ranges, max(month, first_stored), min(month_end, last_stored))
+        if not snapshot_months and not live_ranges:
+            return DashboardStats(weekly_trends=[], source_breakdown=[], top_merchants=[], category_spending=[])
+
+        months = [month_bucket(month) for month in snapshot_months]
+        live = TransactionRepository._rollup_parts(live_ranges) if live_ranges else {}
+
+        def rows_of(kind, snapshot):
+            """The snapshot and live rows of one kind, as a subquery."""
+            selects = list(live.get(kind, []))
+            if months:
+                selects.append(snapshot.where(MonthSnapshot.kind == kind, MonthSnapshot.month.in_(months)))
+            return (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+
+        def totals(kind):
+            """Snapshot amounts summed per label, read in order from ix_month_snapshots_kind_label."""
+            return select(
+                null().label("month"),
+                MonthSnapshot.kind,
+                literal("").label("week"),
+                MonthSnapshot.label,
+                func.max(MonthSnapshot.merchant).label("merchant"),
+                func.sum(MonthSnapshot.amount).label("amount"),
+                func.sum(MonthSnapshot.count).label("count")
+            ).group_by(MonthSnapshot.kind, MonthSnapshot.label)
+
+        def part(kind, rows, label, group_by, month=null(), week=null(), count=null()):
+            return select(
+                literal(kind).label("kind"),
+                month.label("month"),
+                week.label("week"),
+                label.label("label"),
+                func.sum(rows.c.amount).label("amount"),
+                count.label("count")
+            ).group_by(*group_by)
+
+        # Snapshot and live weeks never share a month, so week rows need no regrouping
+        weeks = rows_of("week", select(
+            MonthSnapshot.month, MonthSnapshot.kind, MonthSnapshot.week, MonthSnapshot.label,
+            MonthSnapshot.merchant, MonthSnapshot.amount, MonthSnapshot.count
+        ))
+        sources, categories, merchants = (rows_of(kind, totals(kind)) for kind in ("source", "category", "merchant"))
+        # Rows without a merchant form one group, listed as "Unknown" like any other
+        merchants = (
+            part("merchant", merchants, func.max(merchants.c.merchant), [merchants.c.label],
+                 count=func.sum(merchants.c.count))
+            .order_by(text("amount DESC, label"))
+            .limit(merchant_limit)
+            .subquery()
+        )
+        rows = session.execute(
+            union_all(
+                select(
+                    literal("week").label("kind"), weeks.c.month, weeks.c.week, weeks.c.label,
+                    weeks.c.amount, null().label("count")
+                ),
+                part("source", sources, sources.c.label, [sources.c.label]),
+                part("category", categories, categories.c.label, [categories.c.label]),
+                # SQLite allows LIMIT inside a compound select only in a subquery
+                select(merchants)
+            ).order_by(text("kind, month, week, amount DESC, label"))
+        )
+
+        trends = {}
+        weekly_trends, source_breakdown, top_merchants, category_spending = [], [], [], []
+        for kind, month, week, label, amount, count in rows:
+            if kind == "week":
+                if month not in trends:
+                    trends[month] = MonthlyWeeklyTrend(month=month, weeks=[])
+                    weekly_trends.append(trends[month])
+                weeks = trends[month].weeks
+                if not weeks or weeks[-1].week != week:
+                    # Week numbers are 0-based; labels start at W1
+                    weeks.append(WeeklyTrendData(
+                        week=week, week_label=f"W{int(week.split('-')[1]) + 1}", categories={}
+                    ))
+                weeks[-1].categories[label] = int(amount)
+            elif kind == "source":
+                source_breakdown.append({"source": label, "amount": int(amount)})
+            elif kind == "category":
+                category_spending.append({"category": label, "amount": int(amount)})
+            else:
+                top_merchants.append({"merchant": label or "Unknown", "amount": int(amount), "count": count})
+
+        # Shares of the total, rounded in Python; a zero total counts as 1
+        for breakdown in (source_breakdown, category_spending):
+            grand_total = sum(row["amount"] for row in breakdown) or 1
+            for row in breakdown:
+                row["percentage"] = round((row["amount"] / grand_total) * 100, 2)
+        return DashboardStats(
+            weekly_trends=weekly_trends,
+            source_breakdown=source_breakdown,
+            top_merchants=top_merchants,
+            category_spending=category_spending
+        )
+
+    @staticmethod
+    def build_month_snapshots(session: Session, today: Optional[date] = None) -> None:
+        """Snapshot every closed month that has none yet, and commit.
+
+        Writes to transactions drop the snapshots of the months they touch
+        through the rollup triggers. Imports and recategorization rebuild them
+        once per run and start-up catches up on the rest; until then a month
+        is aggregated live. Dashboard requests only read snapshots.
+        """
+        first_day = session.scalar(select(func.min(DailyRollup.day)))
+        if first_day is None:
+            return
+        open_from = _month_start(today or date.today(), 1 - SNAPSHOT_OPEN_MONTHS)
+        months = list(_months_between(first_day, open_from - timedelta(days=1)))
+        built = TransactionRepository._snapshotted_months(session, months)
+        missing = [month for month in months if month_bucket(month) not in built]
+        if not missing:
+            return
+
+        ranges = []
+        for month in missing:
+            _add_range(ranges, month, _month_start(month, 1) - timedelta(days=1))
+        columns = ["month", "kind", "week", "label", "merchant", "amount", "count"]
+        # One statement per range keeps each compound SELECT small
+        for first, last in ranges:
+            parts = TransactionRepository._rollup_parts([(first, last)], per_month=True)
+            # Another import may build the same month at once; the rows are identical
+            session.execute(
+                sqlite_insert(MonthSnapshot)
+                .from_select(columns, union_all(*(part for kind in parts.values() for part in kind)))
+                .on_conflict_do_nothing()
+            )
+        session.execute(
+            sqlite_insert(MonthSnapshot).on_conflict_do_nothing(),
+            [{"month": month_bucket(month), "kind": "total", "week": "", "label": "", "amount": 0, "count": 0}
+             for month in missing]
+        )
+        session.commit()
+
+    @staticmethod
+    def _snapshotted_months(session: Session, months: list) -> set[str]:
+        """The buckets of the given months (first days) that have a snapshot."""
+        if not months:
+            return set()
+        return set(session.scalars(select(MonthSnapshot.month).where(
+            MonthSnapshot.kind == "total", MonthSnapshot.month.in_([month_bucket(month) for month in months])
+        )))
+
+    @staticmethod
+    def _rollup_parts(ranges: list, per_month: bool = False) -> dict:
+        """Aggregate daily_rollups over (first, last) day ranges, as SELECTs per kind.
+
+        Rows are shaped like month_snapshots. Week rows always carry their
+        month; the other kinds only when per_month, bucketing the day itself
+        so each aggregation stays on its covering index. Every range gets its
+        own SELECT, as OR'd ranges would turn the index searches into scans.
+        """
+        month = func.substr(DailyRollup.day, 1, 7) if per_month else null()
+
+        def part(kind, first, last, label, merchant=null(), count=literal(0)):
+            group_by = [label, month] if per_month else [label]
+            return select(
+                month.label("month"),
+                literal(kind).label("kind"),
+                literal("").label("week"),
+                label.label("label"),
+                merchant.label("merchant"),
+                func.sum(DailyRollup.amount).label("amount"),
+                count.label("count")
+            ).where(DailyRollup.day.between(first, last)).group_by(*group_by)
+
+        def weeks(first, last):
+            return select(
+                DailyRollup.month,
+                literal("week").label("kind"),
+                DailyRollup.week,
+                DailyRollup.category.label("label"),
+                null().label("merchant"),
+                func.sum(DailyRollup.amount).label("amount"),
+                literal(0).label("count")
+            ).where(
+                # Month bounds let the month-first index narrow the scan
+                DailyRollup.month.between(month_bucket(first), month_bucket(last)),
+                DailyRollup.day.between(first, last)
+            ).group_by(DailyRollup.month, DailyRollup.week, DailyRollup.category)
+
+        return {
+            "week": [weeks(first, last) for first, last in ranges],
+            "source": [part("source", first, last, DailyRollup.source) for first, last in ranges],
+            "category": [part("category", first, last, DailyRollup.category) for first, last in ranges],
+            "merchant": [
+                part("merchant", first, last, DailyRollup.merchant_key,
+                     func.max(DailyRollup.merchant), func.sum(DailyRollup.count))
+                for first, last in ranges
+            ],
+        }
+
+    @staticmethod
+    def get_cached_dashboard_stats(
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        version: Optional[int] = None
+    ) -> DashboardStats:
+        """get_dashboard_stats, cached per process and database by (start_date, end_date, version).
+
+        version is the transactions data version, read when not given. Every
+        write to transactions bumps it, so cached results never go stale;
+        entries for old versions simply age out of the LRU.
+        """
+        if version is None:
+            version = TransactionRepository.get_data_version(session, TRANSACTIONS_VERSION)
+        engine = session.get_bind()
+        key = (start_date, end_date, version)
+        with _stats_cache_lock:
+            cache = _stats_cache.get(engine)
+            if cache is not None and key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+
+        stats = TransactionRepository.get_dashboard_stats(session, start_date, end_date)
+        with _stats_cache_lock:
+            cache = _stats_cache.setdefault(engine, OrderedDict())
+            cache[key] = stats
+            while len(cache) > STATS_CACHE_SIZE:
+                cache.popitem(last=False)
+        return stats
+
+    @staticmethod
+    def get_weekly_spending_by_category(session: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> list[MonthlyWeeklyTrend]:
         """Get total spending per week, broken down by category, grouped by month."""
         query = session.query(
             func.strftime("%Y-%m", Transaction.date).label("month"),
@@ -88,7 +524,7 @@ class TransactionRepository:
         return output
 
     @staticmethod
-    def get_source_breakdown(session: Session, start_date: str = None, end_date: str = None) -> list[dict]:
+    def get_source_breakdown(session: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> list[dict]:
         """Get spending breakdown by source with percentages."""
         # Get total amount by source
         query = session.query(
@@ -117,13 +553,17 @@ class TransactionRepository:
         ]
 
     @staticmethod
-    def get_top_merchants(session: Session, limit: int = 10, start_date: str = None, end_date: str = None) -> list[dict]:
-        """Get top merchants by total spending."""
+    def get_top_merchants(session: Session, limit: int = 10, start_date: Optional[date] = None, end_date: Optional[date] = None) -> list[dict]:
+        """Get top merchants by total spending.
+
+        Spellings of a merchant that differ only in case, width or spacing are
+        grouped together by merchant_key and reported under one of them.
+        """
         query = session.query(
-            Transaction.merchant,
+            func.max(Transaction.merchant).label("merchant"),
             func.sum(Transaction.amount).label("amount"),
-            func.count(Transaction.id).label("count")
-        ).filter(Transaction.merchant.isnot(None))
+            func.count().label("count")
+        ).filter(Transaction.merchant_key.isnot(None))
 
         # Apply date filter if provided
         if start_date:
@@ -133,14 +573,14 @@ class TransactionRepository:
 
         return (
             query
-            .group_by(Transaction.merchant)
+            .group_by(Transaction.merchant_key)
             .order_by(text("amount DESC"))
             .limit(limit)
             .all()
         )
 
     @staticmethod
-    def get_category_spending(session: Session, start_date: str = None, end_date: str = None) -> list[dict]:
+    def get_category_spending(session: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> list[dict]:
         """Get spending breakdown by category."""
         # Get totals by category
         query = session.query(
@@ -169,70 +609,331 @@ class TransactionRepository:
         ]
 
     @staticmethod
-    def apply_auto_categorization(session: Session, transaction: Transaction) -> Transaction:
-        """Apply auto-categorization to a transaction based on rules."""
+    def get_keyword_matcher(session: Session) -> KeywordMatcher:
+        """The current category rules compiled into a KeywordMatcher.
+
+        The compiled matcher is cached per process and database; looking it up
+        costs one read of the rules version, and the rules are only loaded
+        and recompiled after create/delete_category_rule bumped the version.
+        """
+        engine = session.get_bind()
+        version = TransactionRepository.get_data_version(session, CATEGORY_RULES_VERSION)
+        with _matcher_cache_lock:
+            cached = _matcher_cache.get(engine)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        rules = session.query(CategoryRule.keyword, CategoryRule.category).all()
+        matcher = KeywordMatcher((rule.keyword, rule.category) for rule in rules)
+        with _matcher_cache_lock:
+            _matcher_cache[engine] = (version, matcher)
+        return matcher
+
+    @staticmethod
+    def get_rule_match_stats(session: Session) -> dict:
+        """Memo counters of the current compiled rules, since the rules last changed."""
+        matcher = TransactionRepository.get_keyword_matcher(session)
+        info = matcher.memo_info()
+        return {
+            "rules_version": TransactionRepository.get_data_version(session, CATEGORY_RULES_VERSION),
+            "rules": matcher.size,
+            "hits": info.hits,
+            "misses": info.misses,
+            "cached": info.currsize,
+            "max_cached": info.maxsize,
+        }
+
+    @staticmethod
+    def apply_auto_categorization(
+        session: Session,
+        transaction: Union[Transaction, ParsedTransaction],
+        matcher: Optional[KeywordMatcher] = None
+    ) -> Union[Transaction, ParsedTransaction]:
+        """Apply auto-categorization to a transaction based on rules.
+
+        The rule with the longest keyword contained in the merchant name wins.
+        Pass a matcher from get_keyword_matcher() when categorizing many
+        transactions so the rules are loaded and compiled only once.
+        """
         if not transaction.merchant:
             return transaction
 
-        # Get all rules and find matches
-        merchant = str(transaction.merchant).lower()
-
-        # Convert full-width ASCII to half-width ASCII for better matching
-        def normalize_string(s):
-            # Convert full-width ASCII to half-width ASCII
-            result = ''
-            for char in s:
-                # Full-width ASCII range (FF01-FF5E)
-                if 0xFF01 <= ord(char) <= 0xFF5E:
-                    # Convert to half-width
-                    result += chr(ord(char) - 0xFEE0)
-                else:
-                    result += char
-            return result
-
-        merchant_normalized = normalize_string(merchant)
-
-        # Query all rules
-        all_rules = session.query(CategoryRule).all()
-
-        # Find all rules where the keyword is contained in the merchant name
-        matching_rules = []
-        for rule in all_rules:
-            if not rule.keyword:
-                continue
+        if matcher is None:
+            matcher = TransactionRepository.get_keyword_matcher(session)
 
-            rule_kw = normalize_string(rule.keyword.lower())
+        # Parsed rows carry their normalized merchant key already
+        key = getattr(transaction, "merchant_key", None)
+        category = matcher.match_key(key) if key else matcher.match(transaction.merchant)
+        if category is not None:
+            transaction.category = category
 
-            # Remove all spaces (including full-width) for comparison
-            merchant_no_spaces = merchant_normalized.replace(' ', '').replace('\u3000', '')
-            rule_no_spaces = rule_kw.replace(' ', '').replace('\u3000', '')
+        return transaction
+
+    @staticmethod
+    def recategorize(
+        session: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        source: Optional[str] = None,
+        uncategorized_only: bool = False,
+        chunk_size: int = RECATEGORIZE_CHUNK_SIZE
+    ) -> tuple[int, int]:
+        """Re-apply the current category rules to stored transactions.
+
+        Categories follow from the merchant key alone, so one grouped query
+        counts the rows in scope per key and category, each distinct key is
+        matched once, and only keys with rows to change are updated (see
+        _update_per_key). As at import, rows no rule matches keep their
+        category; rows whose category was set by hand (category_locked) are
+        skipped.
+
+        Returns the (scanned, changed) row counts.
+        """
+        matcher = TransactionRepository.get_keyword_matcher(session)
+        table = Transaction.__table__
+
+        # Categories set by hand are never overwritten by rules
+        scope = [table.c.category_locked.is_(False)]
+        criteria = ""
+        bounds = {}
+        if start_date:
+            scope.append(table.c.date >= start_date)
+            criteria += " AND date >= :start_date"
+            bounds["start_date"] = start_date.isoformat()
+        if end_date:
+            scope.append(table.c.date <= end_date)
+            criteria += " AND date <= :end_date"
+            bounds["end_date"] = end_date.isoformat()
+        if source:
+            scope.append(table.c.source == source)
+            criteria += " AND source = :source"
+            bounds["source"] = source
+        if uncategorized_only:
+            scope.append(table.c.category == "Uncategorized")
+            criteria += " AND category = 'Uncategorized'"
+
+        groups = session.execute(
+            select(table.c.merchant_key, table.c.category, func.count().label("rows"))
+            .where(*scope)
+            .group_by(table.c.merchant_key, table.c.category)
+        ).all()
+        scanned = sum(group.rows for group in groups)
+
+        assignments = {}
+        for group in groups:
+            category = matcher.match_key(group.merchant_key)
+            if category is not None and category != group.category:
+                assignments[group.merchant_key] = {"key": group.merchant_key, "new_category": category, **bounds}
+
+        changed = TransactionRepository._update_per_key(session, list(assignments.values()), chunk_size, criteria)
+        if changed:
+            TransactionRepository.build_month_snapshots(session)
+        return scanned, changed
 
-            # Check if rule matches anywhere in merchant name
-            if (rule_kw in merchant_normalized or
-                rule_no_spaces in merchant_no_spaces or
-                merchant_no_spaces.find(rule_no_spaces) >= 0):
-                matching_rules.append(rule)
+    @staticmethod
+    def _update_per_key(session: Session, params: list, chunk_size: int, criteria: str = "") -> int:
+        """Set the category of a merchant key's unlocked rows to new_category, for each params entry.
+
+        criteria further limits the rows, with its bind values in each entry.
+        Runs as one executemany per chunk_size keys, each chunk committed.
+
+        daily_rollups is kept in step per key and day rather than per row:
+        before the UPDATE, the key's rollup rows on the days with rows to
+        change are recomputed with those rows in their new category, and the
+        rollup trigger is paused for the UPDATE itself (see RollupPause).
+
+        Returns the number of rows changed.
+        """
+        rows = f"merchant_key = :key AND category_locked = 0 AND category != :new_category{criteria}"
+        days = f"SELECT date FROM transactions WHERE {rows}"
+        clear_rollups = text(f"DELETE FROM daily_rollups WHERE merchant_key = :key AND day IN ({days})")
+        # As rebuild_daily_rollups, for the key on those days
+        fill_rollups = text(
+            "INSERT INTO daily_rollups (day, month, week, category, source, merchant_key, merchant, amount, count)"
+            " SELECT date, strftime('%Y-%m', date), strftime('%Y-%W', date),"
+            f" CASE WHEN {rows} THEN :new_category ELSE category END AS new_category,"
+            " source, merchant_key, max(merchant), sum(amount), count(*)"
+            f" FROM transactions WHERE merchant_key = :key AND date IN ({days})"
+            " GROUP BY date, new_category, source"
+        )
+        assign = text(f"UPDATE transactions SET category = :new_category WHERE {rows}")
+
+        changed = 0
+        for i in range(0, len(params), chunk_size):
+            chunk = params[i:i + chunk_size]
+            session.execute(clear_rollups, chunk)
+            session.execute(fill_rollups, chunk)
+            session.execute(sqlite_insert(RollupPause).values(name="category_update"))
+            rowcount = session.execute(assign, chunk).rowcount
+            session.execute(delete(RollupPause))
+            if rowcount:
+                TransactionRepository.bump_data_version(session, TRANSACTIONS_VERSION)
+            session.commit()
+            changed += rowcount
+        return changed
 
-        if matching_rules:
-            # Find the rule with the longest keyword (highest precedence)
-            best_rule = max(matching_rules, key=lambda r: len(r.keyword))
-            transaction.category = best_rule.category
+    # Data version methods
+    @staticmethod
+    def get_data_version(session: Session, name: str) -> int:
+        """Current version of a data set; 0 if it was never bumped."""
+        version = session.query(DataVersion.version).filter(DataVersion.name == name).scalar()
+        return version or 0
 
-        return transaction
+    @staticmethod
+    def bump_data_version(session: Session, name: str):
+        """Increment a data set's version as part of the session's transaction."""
+        stmt = sqlite_insert(DataVersion).values(name=name, version=1)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[DataVersion.name],
+            set_={"version": DataVersion.version + 1}
+        ))
 
     # Category Rule methods
     @staticmethod
-    def create_category_rule(session: Session, keyword: str, category: str) -> CategoryRule:
-        """Create a new category rule."""
+    def preview_category_rule(session: Session, keyword: str, sample_size: int = PREVIEW_SAMPLE_SIZE) -> dict:
+        """Show which stored transactions a candidate rule keyword would categorize.
+
+        matched counts the transactions whose merchant contains the keyword;
+        captured those the new rule would win, and kept_by_longer_rules those
+        an existing, longer keyword keeps. Merchants are found through the
+        merchant key index (see _merchant_keys_containing) and counted from
+        daily_rollups, with their display name and the category their rows
+        carry now. Raises ValueError for a keyword that normalizes to nothing.
+        """
+        key = normalize_keyword(keyword)
+        if not key:
+            raise ValueError("Keyword must contain a non-space character")
+
+        # daily_rollups holds the stored categories; its merchant index covers this grouping
+        rows = session.execute(
+            select(
+                DailyRollup.merchant_key,
+                DailyRollup.category,
+                func.max(DailyRollup.merchant).label("merchant"),
+                func.sum(DailyRollup.count).label("transactions")
+            )
+            .where(DailyRollup.merchant_key.in_(TransactionRepository._merchant_keys_containing(key)))
+            .group_by(DailyRollup.merchant_key, DailyRollup.category)
+        ).all()
+        groups = {}
+        for row in rows:
+            group = groups.setdefault(row.merchant_key, {"merchant": row.merchant, "transactions": 0, "categories": []})
+            group["merchant"] = max(group["merchant"], row.merchant)
+            group["transactions"] += row.transactions
+            group["categories"].append((row.transactions, row.category))
+
+        # Decide winners with the candidate added after the existing rules,
+        # where a newly created rule ends up
+        candidate = object()
+        rules = [(rule.keyword, rule.category) for rule in session.query(CategoryRule.keyword, CategoryRule.category)]
+        # Not the shared import matcher: previews must not fill its memo or its match stats
+        with_candidate = KeywordMatcher(rules + [(keyword, candidate)], memo_size=0)
+
+        matched = 0
+        captured = 0
+        samples = []
+        for merchant_key, group in sorted(groups.items(), key=lambda item: -item[1]["transactions"]):
+            is_captured = with_candidate.match_key(merchant_key) is candidate
+            matched += group["transactions"]
+            captured += group["transactions"] if is_captured else 0
+            if len(samples) < sample_size:
+                samples.append({
+                    "merchant": group["merchant"],
+                    "transactions": group["transactions"],
+                    # The category most of the merchant's rows carry now
+                    "current_category": max(group["categories"])[1],
+                    "captured": is_captured,
+                })
+
+        return {
+            "keyword": keyword,
+            "matched": matched,
+            "captured": captured,
+            "kept_by_longer_rules": matched - captured,
+            "samples": samples,
+        }
+
+    @staticmethod
+    def _merchant_keys_containing(key: str):
+        """Select the stored merchant keys that contain the normalized keyword key.
+
+        Keys of three or more characters are looked up in the merchant_keys_fts
+        trigram index; shorter ones scan merchant_keys, which holds each
+        distinct key once. Neither reads transactions.
+        """
+        keys = select(MerchantKey.key).where(func.instr(MerchantKey.key, key) > 0)
+        if len(key) >= SEARCH_MIN_TRIGRAM_LENGTH:
+            fts = table("merchant_keys_fts", column("rowid"))
+            # The trigram index narrows the keys down; instr keeps the match exact
+            phrase = '"' + key.replace('"', '""') + '"'
+            keys = (
+                keys
+                .join(fts, fts.c.rowid == MerchantKey.id)
+                .where(text("merchant_keys_fts MATCH :phrase").bindparams(phrase=phrase))
+            )
+        return keys
+
+    @staticmethod
+    def create_category_rule(
+        session: Session,
+        keyword: str,
+        category: str,
+        apply_to_existing: bool = False
+    ) -> CategoryRule:
+        """Create a new category rule.
+
+        With apply_to_existing, stored transactions the new rule now wins are
+        recategorized too (see recategorize_keyword); the number changed is
+        set on the returned rule as `recategorized`.
+        """
         rule = CategoryRule(
             keyword=keyword,
             category=category
         )
         session.add(rule)
+        TransactionRepository.bump_data_version(session, CATEGORY_RULES_VERSION)
         session.commit()
         session.refresh(rule)
+        if apply_to_existing:
+            rule.recategorized = TransactionRepository.recategorize_keyword(session, keyword)
         return rule
 
+    @staticmethod
+    def bulk_create_category_rules(
+        session: Session,
+        rules: Iterable[tuple[str, str]],
+        replace: bool = False
+    ) -> tuple[int, int]:
+        """Create many (keyword, category) rules in one transaction.
+
+        Exact duplicates, within rules or of rules already stored, are
+        skipped. With replace, the existing rules are deleted first. The rules
+        version is bumped once, so the matcher is recompiled once afterwards.
+
+        Returns the (created, skipped) counts.
+        """
+        if replace:
+            session.query(CategoryRule).delete()
+            seen = set()
+        else:
+            seen = set(session.query(CategoryRule.keyword, CategoryRule.category).all())
+
+        new_rules = []
+        skipped = 0
+        for keyword, category in rules:
+            if (keyword, category) in seen:
+                skipped += 1
+                continue
+            seen.add((keyword, category))
+            new_rules.append({"keyword": keyword, "category": category})
+
+        if new_rules:
+            session.execute(CategoryRule.__table__.insert(), new_rules)
+        if new_rules or replace:
+            TransactionRepository.bump_data_version(session, CATEGORY_RULES_VERSION)
+        session.commit()
+        return len(new_rules), skipped
+
     @staticmethod
     def get_all_category_rules(session: Session) -> list[CategoryRule]:
         """Get all category rules, ordered by keyword length (longest first)."""
@@ -243,11 +944,64 @@ class TransactionRepository:
         )
 
     @staticmethod
-    def delete_category_rule(session: Session, rule_id: str) -> bool:
-        """Delete a category rule by ID."""
+    def delete_category_rule(session: Session, rule_id: str, apply_to_existing: bool = False) -> bool:
+        """Delete a category rule by ID.
+
+        With apply_to_existing, the transactions the rule could have matched
+        are recategorized with the remaining rules (see recategorize_keyword).
+        """
         rule = session.query(CategoryRule).filter(CategoryRule.id == rule_id).first()
         if rule:
+            keyword, category = rule.keyword, rule.category
             session.delete(rule)
+            TransactionRepository.bump_data_version(session, CATEGORY_RULES_VERSION)
             session.commit()
+            if apply_to_existing:
+                TransactionRepository.recategorize_keyword(session, keyword, removed_category=category)
             return True
         return False
+
+    @staticmethod
+    def recategorize_keyword(
+        session: Session,
+        keyword: str,
+        removed_category: Optional[str] = None,
+        chunk_size: int = RECATEGORIZE_CHUNK_SIZE
+    ) -> int:
+        """Re-apply the rules to the transactions a just added or removed keyword can affect.
+
+        Only merchants containing the keyword can change category, so the
+        distinct merchant keys are found through the merchant key index (see
+        _merchant_keys_containing) and each one is re-matched once; rows are then updated per key, skipping
+        locked rows. After a rule is removed (removed_category given), rows
+        no remaining rule matches go back to Uncategorized if they still
+        carry the removed rule's category.
+
+        Returns the number of transactions changed.
+        """
+        key = normalize_keyword(keyword)
+        if not key:
+            # A keyword without a single non-space character can affect every row
+            scanned, changed = TransactionRepository.recategorize(session)
+            return changed
+
+        matcher = TransactionRepository.get_keyword_matcher(session)
+        merchant_keys = session.scalars(TransactionRepository._merchant_keys_containing(key)).all()
+
+        assignments = []
+        unassignments = []
+        for merchant_key in merchant_keys:
+            category = matcher.match_key(merchant_key)
+            if category is not None:
+                assignments.append({"key": merchant_key, "new_category": category})
+            elif removed_category is not None:
+                unassignments.append({"key": merchant_key, "new_category": "Uncategorized", "old_category": removed_category})
+
+        changed = TransactionRepository._update_per_key(session, assignments, chunk_size)
+        # Rows no rule matches any more give up the removed rule's category
+        changed += TransactionRepository._update_per_key(
+            session, unassignments, chunk_size, " AND category = :old_category"
+        )
+        if changed:
+            TransactionRepository.build_month_snapshots(session)
+        return changed
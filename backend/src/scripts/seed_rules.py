@@ -2,7 +2,6 @@
 
 import sys
 import os
-from datetime import datetime
 
 # Add parent directories to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
@@ -10,6 +9,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.infrastructure.database import engine
 from src.infrastructure.models import CategoryRule
+from src.infrastructure.repositories import TransactionRepository
 
 def seed_category_rules():
     """Seed default category rules for common Japanese merchants."""
@@ -158,31 +158,17 @@ def seed_category_rules():
     session = Session()
 
     try:
-        # Clear existing rules
+        # Replace existing rules in one transaction; exact duplicates in the
+        # list above are skipped
         existing_count = session.query(CategoryRule).count()
         if existing_count > 0:
             print(f"Clearing {existing_count} existing rules...")
-            session.query(CategoryRule).delete()
-
-        # Add new rules
-        added_count = 0
-        for rule_data in default_rules:
-            # Check if rule already exists
-            existing = session.query(CategoryRule).filter(
-                CategoryRule.keyword == rule_data["keyword"]
-            ).first()
-
-            if not existing:
-                rule = CategoryRule(
-                    keyword=rule_data["keyword"],
-                    category=rule_data["category"],
-                    created_at=datetime.utcnow()
-                )
-                session.add(rule)
-                added_count += 1
-
-        session.commit()
-        print(f"Successfully seeded {added_count} category rules")
+        added_count, skipped_count = TransactionRepository.bulk_create_category_rules(
+            session,
+            ((rule_data["keyword"], rule_data["category"]) for rule_data in default_rules),
+            replace=True
+        )
+        print(f"Successfully seeded {added_count} category rules ({skipped_count} duplicates skipped)")
 
         # Show categories summary
         categories = session.query(CategoryRule.category).distinct().all()
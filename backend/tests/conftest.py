@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.api.transactions import router as transactions_router
+from src.infrastructure.database import get_db
+from src.infrastructure.migrations import upgrade_database
+from src.infrastructure.models import CategoryRule
+
+
+@pytest.fixture
+def session_factory():
+    """Sessions on a fresh in-memory database with the app's full schema."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    upgrade_database(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def db_session(session_factory):
+    session = session_factory()
+    session.add(CategoryRule(keyword="スターバックス", category="Coffee"))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db_session):
+    app = FastAPI()
+    app.include_router(transactions_router, prefix="/api/transactions")
+    app.dependency_overrides[get_db] = lambda: db_session
+    return TestClient(app)
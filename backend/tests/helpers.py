@@ -0,0 +1,19 @@
+import io
+
+PAYPAY_HEADER = "Date & Time,Amount Outgoing (Yen),Amount Incoming (Yen),Transaction Type,Business Name,Method,Transaction ID\n"
+
+
+def paypay_csv(rows: int, start: int = 0) -> bytes:
+    """A PayPay statement of `rows` payments to three スターバックス merchants in November 2025."""
+    lines = [
+        f"2025/11/{1 + i % 28:02d} 10:30:00,{100 + i},-,Payment,スターバックス{i % 3},PayPay Balance,{start + i:020d}\n"
+        for i in range(rows)
+    ]
+    return (PAYPAY_HEADER + "".join(lines)).encode('utf-8')
+
+
+def upload(client, content: bytes, filename: str = "paypay.csv"):
+    return client.post(
+        "/api/transactions/upload",
+        files={"file": (filename, io.BytesIO(content), "text/csv")},
+    )
@@ -0,0 +1,175 @@
+from datetime import date
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.models import CategoryRule, Transaction
+from src.infrastructure.repositories import CATEGORY_RULES_VERSION, TransactionRepository
+from helpers import paypay_csv, upload
+
+
+def test_compiled_rules_are_cached_until_rules_change(client, db_session):
+    first = TransactionRepository.get_keyword_matcher(db_session)
+    assert TransactionRepository.get_keyword_matcher(db_session) is first
+
+    response = client.post("/api/transactions/category-rules", json={"keyword": "スターバックス1", "category": "Treats"})
+    rule_id = response.json()["id"]
+
+    # Creating a rule bumps the version, so the next lookup recompiles
+    second = TransactionRepository.get_keyword_matcher(db_session)
+    assert second is not first
+    assert second.match("スターバックス1") == "Treats"
+
+    client.delete(f"/api/transactions/category-rules/{rule_id}")
+    assert TransactionRepository.get_keyword_matcher(db_session).match("スターバックス1") == "Coffee"
+    assert TransactionRepository.get_data_version(db_session, CATEGORY_RULES_VERSION) == 2
+
+
+def test_bulk_rule_import_skips_duplicates_and_round_trips_export(client, db_session):
+    existing = client.get("/api/transactions/category-rules/export").json()["rules"]
+    version = TransactionRepository.get_data_version(db_session, CATEGORY_RULES_VERSION)
+    rules = [{"keyword": f"店舗{i}", "category": "Shops"} for i in range(2000)]
+    rules += [
+        {"keyword": "ローソン", "category": "Convenience Store"},
+        {"keyword": "ローソン", "category": "Convenience Store"},
+        {"keyword": "店舗7", "category": "Shops"},
+        existing[0],
+    ]
+
+    response = client.post("/api/transactions/category-rules/bulk", json={"rules": rules})
+
+    assert response.status_code == 200
+    assert (response.json()["created"], response.json()["skipped"]) == (2001, 3)
+    # One version bump for the whole import, so the matcher is compiled once
+    assert TransactionRepository.get_data_version(db_session, CATEGORY_RULES_VERSION) == version + 1
+    assert TransactionRepository.get_keyword_matcher(db_session).match("店舗1999 本店") == "Shops"
+
+    exported = client.get("/api/transactions/category-rules/export").json()["rules"]
+    assert len(exported) == len(existing) + 2001
+
+    response = client.post("/api/transactions/category-rules/bulk", json={"rules": exported[:10], "replace": True})
+    assert (response.json()["created"], response.json()["skipped"]) == (10, 0)
+    assert db_session.query(CategoryRule).count() == 10
+
+
+def test_recategorize_applies_new_rules_in_chunks(client, db_session):
+    upload(client, paypay_csv(30))
+    # Manual category on one row that a new rule would otherwise change
+    db_session.query(Transaction).filter(Transaction.merchant == "スターバックス0").first().category = "Gift"
+    db_session.commit()
+    client.post("/api/transactions/category-rules", json={"keyword": "スターバックス2", "category": "Treats"})
+
+    # November 1-7 holds 9 rows: three for merchant 2 plus the manually changed one
+    scanned, changed = TransactionRepository.recategorize(
+        db_session, start_date=date(2025, 11, 1), end_date=date(2025, 11, 7), chunk_size=3
+    )
+    assert (scanned, changed) == (9, 4)
+
+    response = client.post("/api/transactions/recategorize", json={})
+    assert response.json()["scanned"] == 30
+    categories = {(t.merchant, t.category) for t in db_session.query(Transaction)}
+    assert categories == {("スターバックス0", "Coffee"), ("スターバックス1", "Coffee"), ("スターバックス2", "Treats")}
+
+    response = client.post("/api/transactions/recategorize", json={"uncategorized_only": True})
+    assert response.json() == {
+        "scanned": 0, "changed": 0, "message": "Recategorization complete. 0 of 0 transactions changed."
+    }
+
+
+def test_category_memo_is_shared_across_imports_and_flushed_on_rule_changes(client):
+    upload(client, paypay_csv(30))
+    # 3 distinct merchants: one miss each, the other 27 rows hit the memo
+    stats = client.get("/api/transactions/category-rules/match-stats").json()
+    assert (stats["rules"], stats["hits"], stats["misses"], stats["cached"]) == (1, 27, 3, 3)
+
+    upload(client, paypay_csv(10, start=100))
+    stats = client.get("/api/transactions/category-rules/match-stats").json()
+    assert (stats["hits"], stats["misses"]) == (37, 3)
+
+    client.post("/api/transactions/category-rules", json={"keyword": "Shop", "category": "Shopping"})
+    stats = client.get("/api/transactions/category-rules/match-stats").json()
+    assert (stats["rules_version"], stats["rules"], stats["hits"], stats["misses"]) == (1, 2, 0, 0)
+
+
+def test_rule_preview_counts_captured_and_kept_rows(client):
+    upload(client, paypay_csv(30))
+    client.post("/api/transactions/category-rules", json={"keyword": "スターバックス2", "category": "Treats"})
+
+    response = client.get("/api/transactions/category-rules/preview", params={"keyword": "ｽﾀｰﾊﾞｯｸｽ"})
+    assert response.json()["matched"] == 0
+
+    # "バックス" is shorter than both existing keywords, so it captures nothing
+    preview = client.get("/api/transactions/category-rules/preview", params={"keyword": "バックス"}).json()
+    assert (preview["matched"], preview["captured"], preview["kept_by_longer_rules"]) == (30, 0, 30)
+
+    # A keyword longer than "スターバックス" takes merchant 1 from it
+    stats = client.get("/api/transactions/category-rules/match-stats").json()
+    preview = client.get("/api/transactions/category-rules/preview", params={"keyword": "スターバックス1"}).json()
+    # Previews leave the import memo and its counters alone
+    assert client.get("/api/transactions/category-rules/match-stats").json() == stats
+    assert (preview["matched"], preview["captured"]) == (10, 10)
+    assert preview["samples"] == [
+        {"merchant": "スターバックス1", "transactions": 10, "current_category": "Coffee", "captured": True}
+    ]
+
+    # An equally long keyword loses the tie to the rule created before it
+    preview = client.get("/api/transactions/category-rules/preview", params={"keyword": "スターバックス2"}).json()
+    assert (preview["matched"], preview["captured"]) == (10, 0)
+    # The rows still carry the category they were stored with
+    assert preview["samples"][0]["current_category"] == "Coffee"
+
+    # Keywords too short for the trigram index search the distinct merchant keys
+    preview = client.get("/api/transactions/category-rules/preview", params={"keyword": "クス"}).json()
+    assert (preview["matched"], len(preview["samples"])) == (30, 3)
+
+    assert client.get("/api/transactions/category-rules/preview", params={"keyword": "　"}).status_code == 400
+
+
+def test_rule_changes_recategorize_affected_rows_and_keep_manual_categories(client, db_session):
+    upload(client, paypay_csv(30))
+    manual = db_session.query(Transaction).filter(Transaction.merchant == "スターバックス1").first()
+    response = client.patch(f"/api/transactions/{manual.id}", json={"category": "Gift"})
+    assert response.json()["category_locked"] is True
+
+    response = client.post(
+        "/api/transactions/category-rules",
+        params={"apply_to_existing": True},
+        json={"keyword": "スターバックス1", "category": "Treats"}
+    )
+    rule_id = response.json()["id"]
+    # All merchant 1 rows except the one set by hand
+    assert response.json()["recategorized"] == 9
+
+    # Without apply_to_existing a rule only affects future imports
+    response = client.post("/api/transactions/category-rules", json={"keyword": "スターバックス2", "category": "Treats"})
+    assert response.json()["recategorized"] is None
+
+    def categories():
+        db_session.expire_all()
+        counts = {}
+        for t in db_session.query(Transaction):
+            counts[(t.merchant, t.category)] = counts.get((t.merchant, t.category), 0) + 1
+        return counts
+
+    assert categories() == {
+        ("スターバックス0", "Coffee"): 10,
+        ("スターバックス1", "Treats"): 9,
+        ("スターバックス1", "Gift"): 1,
+        ("スターバックス2", "Coffee"): 10,
+    }
+
+    # Deleting the rule hands its rows back to the next best rule
+    client.delete(f"/api/transactions/category-rules/{rule_id}", params={"apply_to_existing": True})
+    assert categories()[("スターバックス1", "Coffee")] == 9
+
+    # With no rule left, rows go back to Uncategorized only if they still
+    # carry the deleted rule's category
+    coffee_rule = db_session.query(CategoryRule).filter(CategoryRule.keyword == "スターバックス").first()
+    client.delete(f"/api/transactions/category-rules/{coffee_rule.id}", params={"apply_to_existing": True})
+    assert categories() == {
+        ("スターバックス0", "Uncategorized"): 10,
+        ("スターバックス1", "Uncategorized"): 9,
+        ("スターバックス1", "Gift"): 1,
+        ("スターバックス2", "Treats"): 10,
+    }
@@ -0,0 +1,283 @@
+import gc
+import hashlib
+import io
+from datetime import date
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine, text
+from starlette.datastructures import UploadFile
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure import importer, parsers
+from src.infrastructure.importer import import_batch, import_files, import_stream
+from src.infrastructure.jobs import ImportJobManager, get_import_jobs
+from src.infrastructure.migrations import upgrade_database
+from src.infrastructure.models import ParsedTransaction, SourceType, Transaction
+from src.infrastructure.parsers import PayPayParser, SMBCParser
+from src.infrastructure.repositories import SQLITE_MAX_VARIABLES, TransactionRepository
+from helpers import paypay_csv, upload
+
+
+def test_paypay_batches_are_bounded():
+    batches = list(PayPayParser().iter_batches(io.BytesIO(paypay_csv(25)), batch_size=10))
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    flat = [t.record_hash for batch in batches for t in batch]
+    assert flat == [t.record_hash for t in PayPayParser().parse(paypay_csv(25), "paypay.csv")]
+
+
+def test_smbc_batches_match_whole_file_parse():
+    content = ('User,4980-00**-****-****,Olive Gold\r\n' + ''.join(
+        f'2025/11/{1 + i % 28:02d},Shop{i},{1000 + i},1,1,{1000 + i},\r\n' for i in range(7)
+    )).encode('cp932')
+    stream = io.BytesIO(content)
+
+    batches = list(SMBCParser().iter_batches(stream, batch_size=3))
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [t.record_hash for batch in batches for t in batch] == [
+        t.record_hash for t in SMBCParser().parse(content, "smbc.csv")
+    ]
+    # The caller's stream is left open for the upload handler to close
+    assert not stream.closed
+
+
+@pytest.mark.parametrize("pandas_min_bytes", [0, parsers.PANDAS_MIN_BYTES])
+def test_smbc_hashes_match_the_whole_file_pandas_parser(monkeypatch, pandas_min_bytes):
+    monkeypatch.setattr(parsers, "PANDAS_MIN_BYTES", pandas_min_bytes)
+    # A blank and a decimal amount made pandas read the amount column as
+    # floats, which hashed every amount as 0; "NA" was read as missing
+    content = (
+        'User,4980-00**-****-****,Olive Gold\r\n'
+        '2025/11/01,NA,,1,1,,\r\n'
+        '2025/11/02,Shop,,1,1,1000,\r\n'
+        '2025/11/03,Cafe,,1,1,1000.5,\r\n'
+    ).encode('cp932')
+
+    txs = SMBCParser().parse(content, "smbc.csv")
+
+    assert [t.record_hash for t in txs] == [
+        hashlib.sha256(base.encode('utf-8')).hexdigest()
+        for base in ["2025/11/01nan0", "2025/11/02Shop0", "2025/11/03Cafe0"]
+    ]
+    assert [(t.merchant, t.amount) for t in txs] == [("NA", 0), ("Shop", 1000), ("Cafe", 0)]
+
+
+def test_upload_streams_and_skips_duplicates(client, db_session):
+    response = upload(client, paypay_csv(30))
+    assert response.status_code == 200
+    assert response.json()["imported"] == 30
+    assert response.json()["skipped"] == 0
+
+    # Re-uploading overlapping rows only imports the new ones
+    response = upload(client, paypay_csv(40))
+    assert response.json()["imported"] == 10
+    assert response.json()["skipped"] == 30
+
+    assert db_session.query(Transaction).count() == 40
+    assert {t.category for t in db_session.query(Transaction)} == {"Coffee"}
+
+
+class LegacySpool:
+    """SpooledTemporaryFile as of Python 3.10: file methods, but no readable()."""
+
+    def __init__(self, file):
+        self._file = file
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+
+@pytest.mark.parametrize("max_size", [1, 1024 * 1024])
+@pytest.mark.parametrize("legacy", [False, True])
+def test_upload_file_spool_is_parsed_in_place(db_session, max_size, legacy):
+    # A one-byte max_size spools to disk straight away, the larger one stays in memory
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(paypay_csv(30))
+    spool.seek(0)
+    upload_file = UploadFile(LegacySpool(spool._file) if legacy else spool, filename="paypay.csv")
+
+    summary = import_stream(db_session, upload_file.file, upload_file.filename, batch_size=10)
+
+    assert (summary.imported, summary.skipped) == (30, 0)
+    assert not spool.closed
+    spool.close()
+
+
+def test_failed_stream_import_finalizes_parser_before_stream_closes(db_session, monkeypatch):
+    unraisable = []
+    monkeypatch.setattr(sys, "unraisablehook", unraisable.append)
+
+    def fail(*counts):
+        raise RuntimeError("stop")
+
+    with pytest.raises(RuntimeError):
+        with io.BytesIO(paypay_csv(30)) as stream:
+            import_stream(db_session, stream, "paypay.csv", batch_size=10, progress=fail)
+    gc.collect()
+
+    assert unraisable == []
+
+
+def test_upload_rejects_unknown_format(client):
+    response = upload(client, b"foo,bar\n1,2\n", "unknown.csv")
+    assert response.status_code == 400
+
+
+def test_within_file_duplicates_are_skipped(client, db_session):
+    # The last three Transaction IDs repeat ones from earlier in the file
+    content = paypay_csv(5) + paypay_csv(3).split(b"\n", 1)[1]
+
+    response = upload(client, content)
+
+    assert response.json()["imported"] == 5
+    assert response.json()["skipped"] == 3
+    assert db_session.query(Transaction).count() == 5
+
+
+def test_existing_hash_lookup_is_chunked(db_session):
+    stored = PayPayParser().parse(paypay_csv(3), "paypay.csv")
+    for t in stored:
+        TransactionRepository.create(db_session, t)
+
+    # More candidates than SQLite accepts as bound parameters in one statement
+    candidates = [f"{i:020d}" for i in range(SQLITE_MAX_VARIABLES * 2 + 5)]
+    existing = TransactionRepository.get_existing_hashes(db_session, candidates)
+
+    assert existing == {t.record_hash for t in stored}
+
+
+def test_bulk_create_fills_defaults_and_batches(db_session):
+    transactions = PayPayParser().parse(paypay_csv(25), "paypay.csv")
+
+    inserted = TransactionRepository.bulk_create(db_session, transactions, batch_size=10)
+
+    assert inserted == 25
+    stored = db_session.query(Transaction).all()
+    assert len({t.id for t in stored}) == 25
+    assert all(t.created_at is not None for t in stored)
+    # Parsed rows are plain records, never attached to the session
+    assert all(isinstance(t, ParsedTransaction) for t in transactions)
+    assert not db_session.new
+
+
+def test_parsed_records_convert_to_models(db_session):
+    record = PayPayParser().parse(paypay_csv(1), "paypay.csv")[0]
+    assert not hasattr(record, "__dict__")
+
+    stored = TransactionRepository.create(db_session, record)
+
+    assert isinstance(stored, Transaction)
+    assert stored.id is not None
+    assert (stored.record_hash, stored.amount, stored.merchant) == (record.record_hash, 100, "スターバックス0")
+
+
+def test_background_import_job_reports_progress(client, session_factory, db_session):
+    jobs = ImportJobManager(session_factory=session_factory, max_workers=1)
+    client.app.dependency_overrides[get_import_jobs] = lambda: jobs
+
+    response = client.post(
+        "/api/transactions/imports",
+        files={"file": ("paypay.csv", io.BytesIO(paypay_csv(30)), "text/csv")},
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "queued"
+
+    jobs.shutdown(wait=True)
+
+    job = client.get(f"/api/transactions/imports/{job_id}").json()
+    assert job["status"] == "completed"
+    assert job["rows_parsed"] == 30
+    assert job["imported"] == 30
+    assert job["summary"]["imported"] == 30
+    assert job["summary"]["skipped"] == 0
+    assert db_session.query(Transaction).count() == 30
+
+
+def test_concurrent_jobs_importing_the_same_file_skip_each_others_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    upgrade_database(engine)
+    jobs = ImportJobManager(session_factory=sessionmaker(bind=engine), max_workers=2)
+    content = paypay_csv(3000)
+
+    submitted = [jobs.submit(io.BytesIO(content), "paypay.csv") for _ in range(2)]
+    jobs.shutdown(wait=True)
+
+    finished = [jobs.get(job.id) for job in submitted]
+    assert [job.status for job in finished] == ["completed", "completed"]
+    assert [job.summary.imported + job.summary.skipped for job in finished] == [3000, 3000]
+    assert sum(job.summary.imported for job in finished) == 3000
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM transactions")).scalar() == 3000
+
+
+def test_bulk_create_leaves_out_rows_stored_meanwhile(db_session):
+    records = [
+        ParsedTransaction(date(2025, 11, 1), 100, "Cafe", "", "PayPay", SourceType.paypay, f"{i:020d}")
+        for i in range(3)
+    ]
+    assert TransactionRepository.bulk_create(db_session, records[:2]) == 2
+    # As when another import stores rows after this one looked up the existing hashes
+    assert TransactionRepository.bulk_create(db_session, records) == 1
+    assert db_session.query(Transaction).count() == 3
+
+
+def test_background_import_errors(client):
+    response = client.post(
+        "/api/transactions/imports",
+        files={"file": ("unknown.csv", io.BytesIO(b"foo,bar\n1,2\n"), "text/csv")},
+    )
+    assert response.status_code == 400
+    assert client.get("/api/transactions/imports/missing").status_code == 404
+
+
+def test_multi_file_upload_parses_in_parallel_and_merges(client, db_session):
+    files = [
+        ("files", ("nov.csv", io.BytesIO(paypay_csv(20)), "text/csv")),
+        # Overlaps the first file by 10 rows
+        ("files", ("dec.csv", io.BytesIO(paypay_csv(20, start=10)), "text/csv")),
+        ("files", ("notes.csv", io.BytesIO(b"foo,bar\n1,2\n"), "text/csv")),
+    ]
+
+    response = client.post("/api/transactions/upload/batch", files=files)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [(f["filename"], f["imported"], f["skipped"]) for f in body["files"]] == [
+        ("nov.csv", 20, 0),
+        ("dec.csv", 10, 10),
+        ("notes.csv", 0, 0),
+    ]
+    assert body["files"][2]["error"] == "Unknown CSV format"
+    assert (body["imported"], body["skipped"]) == (30, 10)
+    assert db_session.query(Transaction).count() == 30
+
+
+def test_multi_file_upload_reports_rows_committed_before_a_failure(db_session, monkeypatch):
+    calls = []
+
+    def failing_import_batch(session, batch, *args):
+        calls.append(len(batch))
+        if len(calls) == 3:
+            raise RuntimeError("disk full")
+        return import_batch(session, batch, *args)
+
+    monkeypatch.setattr(importer, "import_batch", failing_import_batch)
+    summary = import_files(db_session, [(io.BytesIO(paypay_csv(30)), "nov.csv")], batch_size=10)
+
+    assert [(f.imported, f.skipped, f.error) for f in summary.files] == [(20, 0, "disk full")]
+    assert summary.files[0].message == "Import failed after 20 imported, 0 skipped: disk full"
+    assert (summary.imported, summary.skipped) == (20, 0)
+    assert db_session.query(Transaction).count() == 20
@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.matching import KeywordMatcher, normalize_keyword
+
+
+def test_normalize_keyword_folds_width_case_and_spaces():
+    assert normalize_keyword("ＡＭ　ＰＭ Store") == "ampmstore"
+
+
+def test_longest_keyword_wins():
+    matcher = KeywordMatcher([
+        ("ローソン", "Convenience Store"),
+        ("ローソンストアー", "Supermarket"),
+        ("ストア", "Shop"),
+    ])
+    assert matcher.match("ローソンストアー100 渋谷店") == "Supermarket"
+    assert matcher.match("ローソン原宿店") == "Convenience Store"
+    assert matcher.match("ドン・キホーテ") is None
+
+
+def test_overlapping_keywords_found_through_failure_links():
+    # "bcd" is only found after the walk down "abc..." fails over to it
+    matcher = KeywordMatcher([("abce", "A"), ("bcd", "B"), ("c", "C")])
+    assert matcher.match("xabcdx") == "B"
+    assert matcher.match("xabcex") == "A"
+
+
+def test_ties_go_to_the_earliest_rule_and_empty_keywords_are_ignored():
+    matcher = KeywordMatcher([("", "Empty"), ("cafe", "First"), ("CAFE", "Second")])
+    assert matcher.size == 2
+    assert matcher.match("Ｃａｆｅ Tokyo") == "First"
+    assert matcher.match("") is None
+    assert matcher.match(None) is None
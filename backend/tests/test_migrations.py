@@ -0,0 +1,106 @@
+import os
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure import migrations
+from src.infrastructure.migrations import upgrade_database
+
+# The transactions table as it was before merchant_key was added
+LEGACY_TRANSACTIONS = """
+CREATE TABLE transactions (
+    id VARCHAR NOT NULL PRIMARY KEY,
+    date DATE NOT NULL,
+    amount INTEGER NOT NULL,
+    merchant VARCHAR,
+    description VARCHAR,
+    source VARCHAR NOT NULL,
+    source_type VARCHAR(6) NOT NULL,
+    record_hash VARCHAR NOT NULL,
+    category VARCHAR NOT NULL,
+    created_at DATETIME
+)
+"""
+
+
+def test_upgrade_backfills_merchant_key(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_TRANSACTIONS))
+        conn.execute(
+            text("INSERT INTO transactions VALUES (:id, '2025-11-01', 100, :merchant, '', 'PayPay', 'paypay', :id, 'Uncategorized', NULL)"),
+            [{"id": "1", "merchant": "ＡＭ　ＰＭ 渋谷"}, {"id": "2", "merchant": None}, {"id": "3", "merchant": "Cafe"}]
+        )
+    monkeypatch.setattr(migrations, "BACKFILL_BATCH_SIZE", 2)
+
+    upgrade_database(engine)
+    # Running it again is a no-op
+    upgrade_database(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("transactions")}
+    assert {"merchant_key", "category_locked"} <= columns
+    assert not {"month", "week"} & columns
+    indexes = {index["name"] for index in inspect(engine).get_indexes("transactions")}
+    assert {"ix_transactions_merchant_key", "ix_transactions_date_id"} <= indexes
+    assert not set(migrations.RETIRED_TRANSACTION_INDEXES) & indexes
+    with engine.connect() as conn:
+        keys = dict(conn.execute(text("SELECT id, merchant_key FROM transactions")).all())
+        buckets = set(conn.execute(text("SELECT month, week FROM daily_rollups")).all())
+        # daily_rollups is filled from the rows already there
+        rollups = conn.execute(text("SELECT merchant_key, amount, count FROM daily_rollups ORDER BY 1")).all()
+        # So is merchant_keys, with its trigram index
+        merchant_keys = conn.scalars(text(
+            "SELECT key FROM merchant_keys WHERE id IN (SELECT rowid FROM merchant_keys_fts WHERE merchant_keys_fts MATCH '\"pm渋\"')"
+        )).all()
+    assert keys == {"1": "ampm渋谷", "2": None, "3": "cafe"}
+    assert buckets == {("2025-11", "2025-43")}
+    assert rollups == [("", 100, 1), ("ampm渋谷", 100, 1), ("cafe", 100, 1)]
+    assert merchant_keys == ["ampm渋谷"]
+    with engine.connect() as conn:
+        triggers = set(conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")))
+    assert {"month_snapshots_insert", "month_snapshots_update", "month_snapshots_delete"} <= triggers
+
+
+def test_upgrade_drops_retired_transaction_buckets(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'buckets.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(LEGACY_TRANSACTIONS))
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN month VARCHAR"))
+        conn.execute(text("ALTER TABLE transactions ADD COLUMN week VARCHAR"))
+        conn.execute(text(
+            "CREATE INDEX ix_transactions_month_week_category ON transactions (month, week, category, date, amount)"
+        ))
+        conn.execute(text(
+            "INSERT INTO transactions VALUES ('1', '2025-11-01', 100, 'Cafe', '', 'PayPay', 'paypay', '1',"
+            " 'Uncategorized', NULL, '2025-11', '2025-43')"
+        ))
+
+    upgrade_database(engine)
+
+    assert not {"month", "week"} & {column["name"] for column in inspect(engine).get_columns("transactions")}
+    assert "ix_transactions_month_week_category" not in {index["name"] for index in inspect(engine).get_indexes("transactions")}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT month, week, amount FROM daily_rollups")).all() == [("2025-11", "2025-43", 100)]
+
+
+def test_upgrade_lets_bulk_updates_pause_the_rollup_trigger(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    upgrade_database(engine)
+    # The update trigger as created before bulk updates could pause it
+    with engine.begin() as conn:
+        conn.execute(text("DROP TRIGGER daily_rollups_update"))
+        conn.execute(text(
+            "CREATE TRIGGER daily_rollups_update AFTER UPDATE OF date, amount, category, source, merchant_key"
+            " ON transactions BEGIN"
+            + migrations._ROLLUP_SUBTRACT.format(row="old") + migrations._ROLLUP_ADD.format(row="new") + " END"
+        ))
+
+    upgrade_database(engine)
+
+    with engine.connect() as conn:
+        definition = conn.execute(text(
+            "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'daily_rollups_update'"
+        )).scalar()
+    assert "WHEN NOT EXISTS (SELECT 1 FROM rollup_pauses)" in definition
@@ -1,8 +1,10 @@
+import io
 import sys
 import os
+import pytest
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from src.infrastructure.parsers import PayPayParser, SMBCParser
+from src.infrastructure.parsers import PayPayParser, SMBCParser, TemplateParser, detect_parsers, get_parser
 from src.infrastructure.models import SourceType
 
 def test_paypay_parser():
@@ -20,6 +22,25 @@ def test_paypay_parser():
     assert t.record_hash == "02128111013981929472"
     print("PayPay Parser Test Passed")
 
+def test_paypay_parser_skip_rules_and_amounts():
+    content = """Date & Time,Amount Outgoing (Yen),Amount Incoming (Yen),Transaction Type,Business Name,Method,Transaction ID
+2025/11/30 10:30:00,"1,250",-,Payment,Supermarket,PayPay Balance,001
+2025/11/30 09:15:22,-,"5,000",Top-Up,PayPay,PayPay銀行,002
+2025/11/29 18:45:10,-,800,Refund,Department Store,PayPay Balance,003
+2025/11/29 14:20:33,650,-,Payment,Restaurant,PayPay Balance,
+not a date,650,-,Payment,Restaurant,PayPay Balance,005
+2025/11/28 19:30:15,-,-,Payment,Online Shop,PayPay Balance,006
+""".encode('utf-8')
+    txs = PayPayParser().parse(content, "test.csv")
+
+    # Top-Up, missing Transaction ID and unparseable dates are skipped
+    assert [t.record_hash for t in txs] == ["001", "003", "006"]
+    assert [t.amount for t in txs] == [1250, -800, 0]
+    assert [t.merchant for t in txs] == ["Supermarket", "Department Store", "Online Shop"]
+    assert txs[0].date.isoformat() == "2025-11-30"
+    assert txs[0].description == ""
+    assert all(t.category == "Uncategorized" for t in txs)
+
 def test_smbc_parser():
     # CP932 Sample
     # Header line
@@ -40,6 +61,70 @@ def test_smbc_parser():
     assert "Olive Gold" in t.source
     print("SMBC Parser Test Passed")
 
+def test_smbc_parser_batch_columns():
+    import hashlib
+    content = (
+        'User,4980-00**-****-****,Olive Gold\r\n'
+        '2025/11/28,セブン-イレブン,"1,200",1,1,"1,200",\r\n'
+        '2025/11/29,TestShop,4950,1,1,4950,\r\n'
+        ',,,,,6150,\r\n'
+    ).encode('cp932')
+
+    txs = SMBCParser().parse(content, "test.csv")
+
+    # The trailing total row has no date and is skipped
+    assert [t.amount for t in txs] == [1200, 4950]
+    assert txs[0].merchant == "セブン-イレブン"
+    assert txs[0].source == "Olive Gold (4980-00**-****-****)"
+    assert txs[0].record_hash == hashlib.sha256("2025/11/28セブン-イレブン1200".encode('utf-8')).hexdigest()
+
+def test_detect_parsers_ranks_by_confidence():
+    smbc = ('User,4980-00**-****-****,Ｏｌｉｖｅゴールド\r\n'
+            '2025/11/28,セブン-イレブン,1200,1,1,1200,\r\n').encode('cp932')
+    assert [cls for _, cls in detect_parsers(smbc)] == [SMBCParser]
+    assert isinstance(get_parser("smbc.csv", smbc), SMBCParser)
+
+    # A merchant named "...Card..." in a PayPay export still ranks PayPay first
+    paypay = ("Date & Time,Transaction Type,Business Name,Transaction ID\n"
+              "2025/11/07 18:58:48,Payment,Gift Card Shop,001\n").encode('utf-8')
+    ranked = detect_parsers(paypay)
+    assert ranked[0][1] is PayPayParser
+    assert ranked[0][0] > ranked[1][0]
+
+    template = b"date,amount,description,category\n2026-01-01,1000,Lunch,Food\n"
+    assert isinstance(get_parser("template.csv", template), TemplateParser)
+
+def test_get_parser_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        get_parser("unknown.csv", b"foo,bar\n1,2\n")
+
+def test_csv_and_pandas_paths_agree():
+    paypay = ("\ufeffDate & Time,Amount Outgoing (Yen),Amount Incoming (Yen),Transaction Type,Business Name,Transaction ID\n"
+              "2025/11/07 18:58:48,\"1,200\",-,Payment,NA,001\n"
+              "2025/11/08 09:00:00,-,300,Refund,,002\n"
+              "2025/11/09 09:00:00,-,500,Top-Up,PayPay,003\n").encode('utf-8')
+    smbc = ('User,4980-00**-****-****,Olive Gold\r\n'
+            '2025/11/28,,"1,200",1,1,"1,200",\r\n'
+            '2025/11/29,TestShop,4950,1,1,,\r\n').encode('cp932')
+
+    for parser, content in ((PayPayParser(), paypay), (SMBCParser(), smbc)):
+        via_csv = [t for b in parser._iter_csv_batches(io.BytesIO(content), 10) for t in b]
+        via_pandas = [t for b in parser._iter_frame_batches(io.BytesIO(content), 10) for t in b]
+        fields = lambda t: (t.date, t.amount, t.merchant, t.description, t.source, t.record_hash)
+        assert [fields(t) for t in via_csv] == [fields(t) for t in via_pandas]
+        assert len(via_csv) == 2
+
+def test_small_files_are_parsed_without_pandas(monkeypatch):
+    # Below the size threshold the pandas path is never taken
+    monkeypatch.setattr(PayPayParser, "_iter_frame_batches", None)
+    content = ("Date & Time,Amount Outgoing (Yen),Amount Incoming (Yen),Transaction Type,Business Name,Transaction ID\n"
+               "2025/11/07 18:58:48,100,-,Payment,Shop,001\n").encode('utf-8')
+    txs = PayPayParser().parse(content, "paypay.csv")
+    assert [(t.amount, t.merchant, t.record_hash) for t in txs] == [(100, "Shop", "001")]
+
 if __name__ == "__main__":
     test_paypay_parser()
+    test_paypay_parser_skip_rules_and_amounts()
     test_smbc_parser()
+    test_smbc_parser_batch_columns()
+    test_detect_parsers_ranks_by_confidence()
@@ -1,24 +1,32 @@
 import pytest
+import os
 import sys
 import time
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from datetime import datetime, timedelta
 
 # Import from the src module
-sys.path.append('src')
-from infrastructure.models import Base, Transaction, CategoryRule, SourceType
-from infrastructure.repositories import TransactionRepository
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from src.infrastructure.database import get_db
+from src.infrastructure.migrations import upgrade_database
+from src.infrastructure.models import Transaction, CategoryRule, SourceType
+from src.infrastructure.repositories import TransactionRepository
 from src.api.transactions import router as transactions_router
 from fastapi import FastAPI, Depends
 from fastapi.testclient import TestClient
-import sys
 
 # Create test database
 @pytest.fixture
 def test_db():
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(engine)
+    # One shared connection, usable from the TestClient's worker threads
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    upgrade_database(engine)
     Session = sessionmaker(bind=engine)
     session = Session()
     yield session
@@ -34,7 +42,6 @@ def client(test_db):
     def override_get_db():
         return test_db
 
-    from src.api.dependencies import get_db
     app.dependency_overrides[get_db] = override_get_db
 
     return TestClient(app)
@@ -61,7 +68,7 @@ def sample_transactions(test_db):
 
     for i in range(1000):  # Create 1000 transactions
         date = base_date + timedelta(days=i % 365)
-        merchant_index = i % 50  # Cycle through 50 different merchants
+        merchant_index = i % 20  # Cycle through 20 different merchants
 
         merchants = [
             "スターバックス銀座店", "マクドナルド新宿店", "セブン-イレブン渋谷店",
@@ -118,28 +125,28 @@ class TestDashboardPerformance:
 
         # Assert response contains expected data structure
         data = response.json()
-        assert "monthly_trends" in data
+        assert "weekly_trends" in data
         assert "source_breakdown" in data
         assert "top_merchants" in data
         assert "category_spending" in data
 
         # Assert data is not empty (we added 1000 transactions)
-        assert len(data["monthly_trends"]) > 0
+        assert len(data["weekly_trends"]) > 0
         assert len(data["source_breakdown"]) > 0
         assert len(data["top_merchants"]) > 0
         assert len(data["category_spending"]) > 0
 
         # Assert reasonable data sizes
-        assert len(data["monthly_trends"]) <= 12  # Max 12 months
+        assert len(data["weekly_trends"]) <= 12  # Max 12 months
         assert len(data["top_merchants"]) <= 10    # Max 10 merchants
         assert len(data["category_spending"]) <= 20 # Max 20 categories
 
     def test_transactions_list_response_time(self, client, sample_transactions):
         """Test that /api/transactions responds within 500ms with pagination."""
 
-        # Test with page 1, 20 items per page (default)
+        # Test with page 1, 20 items per page
         start_time = time.time()
-        response = client.get("/api/transactions")
+        response = client.get("/api/transactions/?limit=20")
         end_time = time.time()
 
         response_time_ms = (end_time - start_time) * 1000
@@ -162,7 +169,7 @@ class TestDashboardPerformance:
 
         # Test search filter performance
         start_time = time.time()
-        response = client.get("/api/transactions?search=スターバックス")
+        response = client.get("/api/transactions/search?q=スターバックス")
         end_time = time.time()
 
         response_time_ms = (end_time - start_time) * 1000
@@ -177,20 +184,21 @@ class TestDashboardPerformance:
 
         # Verify we get Starbucks transactions
         data = response.json()
+        assert len(data) > 0
         for transaction in data:
             assert "スターバックス" in transaction.get("merchant", "")
 
     def test_database_query_performance(self, sample_transactions):
         """Test raw database query performance for dashboard stats."""
 
-        # Test monthly spending query
+        # Test weekly spending query
         start_time = time.time()
-        monthly_stats = TransactionRepository.get_monthly_spending(sample_transactions)
+        weekly_stats = TransactionRepository.get_weekly_spending_by_category(sample_transactions)
         end_time = time.time()
 
         query_time_ms = (end_time - start_time) * 1000
 
-        print(f"\nMonthly spending query time: {query_time_ms:.2f}ms")
+        print(f"\nWeekly spending query time: {query_time_ms:.2f}ms")
 
         # Assert query time is under 100ms (much stricter than API)
         assert query_time_ms < 100, f"Database query time {query_time_ms:.2f}ms exceeds 100ms limit"
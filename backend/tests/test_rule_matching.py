@@ -1,13 +1,15 @@
+import os
 import pytest
 import sys
 from datetime import datetime
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-# Import from the src module
-sys.path.append('src')
-from infrastructure.models import Transaction, CategoryRule, SourceType
-from infrastructure.repositories import TransactionRepository
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.database import Base
+from src.infrastructure.models import Transaction, CategoryRule, SourceType
+from src.infrastructure.repositories import TransactionRepository
 
 # Test database setup
 @pytest.fixture
@@ -126,7 +128,7 @@ class TestAutoCategorization:
         # Should match the longer keyword "ローソンストアー"
         assert result.category == "Supermarket"
 
-    def case_insensitive_matching(self, db_session):
+    def test_case_insensitive_matching(self, db_session):
         """Test that matching is case insensitive."""
         transaction = Transaction(
             date=datetime(2023, 1, 15).date(),
@@ -268,7 +270,3 @@ class TestCategoryRuleCRUD:
         success = TransactionRepository.delete_category_rule(db_session, "nonexistent-id")
 
         assert success is False
-
-
-# Import Base for the test fixture
-from infrastructure.models import Base
\ No newline at end of file
@@ -0,0 +1,62 @@
+import os
+import sys
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.migrations import compact_database, upgrade_database
+from src.infrastructure.models import Transaction
+from src.infrastructure.parsers import PayPayParser
+from src.infrastructure.repositories import TransactionRepository
+from helpers import paypay_csv, upload
+
+
+def test_search_finds_substrings_with_filters_and_stays_in_sync(client, db_session):
+    upload(client, paypay_csv(30))
+
+    def search(**params):
+        response = client.get("/api/transactions/search", params=params)
+        assert response.status_code == 200
+        return response.json()
+
+    # Substring in the middle of a Japanese merchant name
+    assert len(search(q="ーバックス1", limit=100)) == 10
+    assert len(search(q="ーバックス1", start_date="2025-11-01", end_date="2025-11-07")) == 3
+    assert search(q="ーバックス1", category="Food") == []
+    # Two characters are below the trigram length and use the LIKE fallback
+    assert len(search(q="ス1", limit=100)) == 10
+
+    # The index follows updates and deletes
+    renamed = db_session.query(Transaction).filter(Transaction.merchant == "スターバックス1").first()
+    renamed.merchant = "ドトール"
+    gone = db_session.query(Transaction).filter(Transaction.merchant == "スターバックス2").first()
+    db_session.delete(gone)
+    db_session.commit()
+
+    assert [t["id"] for t in search(q="ドトール")] == [renamed.id]
+    assert len(search(q="ーバックス1", limit=100)) == 9
+    assert len(search(q="ーバックス2", limit=100)) == 9
+    # FTS syntax in the query is searched for literally
+    assert search(q='"バックス OR x') == []
+
+
+def test_search_survives_compaction(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'compact.db'}")
+    upgrade_database(engine)
+    session = sessionmaker(bind=engine)()
+    TransactionRepository.bulk_create(session, PayPayParser().parse(paypay_csv(30), "paypay.csv"))
+    # Deleting rows leaves gaps in the rowids that VACUUM may close
+    session.query(Transaction).filter(Transaction.merchant == "スターバックス0").delete()
+    session.commit()
+
+    compact_database(engine)
+
+    # Fails if the index refers to rowids the transactions no longer have
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO transactions_fts (transactions_fts, rank) VALUES ('integrity-check', 1)"))
+    results = TransactionRepository.search(session, "ーバックス1", limit=100)
+    assert len(results) == 10
+    assert {t.merchant for t in results} == {"スターバックス1"}
+    session.close()
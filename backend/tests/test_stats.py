@@ -0,0 +1,208 @@
+from datetime import date, timedelta
+import os
+import sys
+
+from sqlalchemy import text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.infrastructure.migrations import rebuild_daily_rollups
+from src.infrastructure.models import ParsedTransaction, SourceType, Transaction
+from src.infrastructure.repositories import TRANSACTIONS_VERSION, TransactionRepository
+from helpers import paypay_csv, upload
+
+
+def test_merchant_key_is_stored_and_groups_top_merchants(db_session):
+    records = [
+        ParsedTransaction(date(2025, 11, 1), 100 + i, merchant, "", "PayPay", SourceType.paypay, f"{i:020d}")
+        for i, merchant in enumerate(["ＡＭ　ＰＭ 渋谷", "am pm渋谷"])
+    ]
+    TransactionRepository.bulk_create(db_session, records)
+    # Rows created through the ORM get their key from the column default
+    TransactionRepository.create(db_session, Transaction(
+        date=date(2025, 11, 3), amount=50, merchant="Ｃａｆｅ", source="Manual Entry",
+        source_type=SourceType.manual, record_hash="manual-1"
+    ))
+
+    keys = {t.merchant: t.merchant_key for t in db_session.query(Transaction)}
+    assert keys == {"ＡＭ　ＰＭ 渋谷": "ampm渋谷", "am pm渋谷": "ampm渋谷", "Ｃａｆｅ": "cafe"}
+
+    top = TransactionRepository.get_top_merchants(db_session)
+    assert [(row.amount, row.count) for row in top] == [(201, 2), (50, 1)]
+
+    # Renaming a merchant moves its rows to the new key, rollups included
+    cafe = db_session.query(Transaction).filter(Transaction.merchant == "Ｃａｆｅ").one()
+    cafe.merchant = "AM PM 渋谷"
+    db_session.commit()
+    assert cafe.merchant_key == "ampm渋谷"
+    top = TransactionRepository.get_top_merchants(db_session)
+    assert [(row.amount, row.count) for row in top] == [(251, 3)]
+
+
+def test_dashboard_stats_match_per_chart_queries(db_session):
+    sources = [("PayPay", SourceType.paypay), ("SMBC", SourceType.smbc)]
+    records = [
+        ParsedTransaction(
+            date(2025, 10, 20) + timedelta(days=i % 40), 100 * (i % 7 + 1), f"Shop{i % 13}", "",
+            *sources[i % 2], f"{i:020d}", category=f"c{i % 5}"
+        )
+        for i in range(300)
+    ]
+    # Statement rows without a business name, among the top merchants
+    records += [
+        ParsedTransaction(date(2025, 11, 3), 5000, "", "", "PayPay", SourceType.paypay, f"blank{i}", category="c0")
+        for i in range(2)
+    ]
+    TransactionRepository.bulk_create(db_session, records)
+
+    for start_date, end_date in [(None, None), (date(2025, 11, 1), date(2025, 11, 20))]:
+        stats = TransactionRepository.get_dashboard_stats(db_session, start_date, end_date, merchant_limit=5)
+
+        weekly = TransactionRepository.get_weekly_spending_by_category(db_session, start_date, end_date)
+        assert stats.weekly_trends == weekly
+        sources_by_name = {row["source"]: row for row in TransactionRepository.get_source_breakdown(db_session, start_date, end_date)}
+        assert {row.source: row.model_dump() for row in stats.source_breakdown} == sources_by_name
+        categories = TransactionRepository.get_category_spending(db_session, start_date, end_date)
+        assert sorted(tuple(row.model_dump().values()) for row in stats.category_spending) == sorted(tuple(row.values()) for row in categories)
+        assert [row.amount for row in stats.category_spending] == sorted((row["amount"] for row in categories), reverse=True)
+        merchants = TransactionRepository.get_top_merchants(db_session, limit=100, start_date=start_date, end_date=end_date)
+        assert [(row.merchant, row.amount, row.count) for row in stats.top_merchants] == [
+            (row.merchant or "Unknown", row.amount, row.count) for row in merchants[:5]
+        ]
+        assert ("Unknown", 10000, 2) in [(row.merchant, row.amount, row.count) for row in stats.top_merchants]
+
+
+def test_dashboard_percentages_round_like_per_chart_queries(db_session):
+    # 1/8 is 12.5% exactly and a third is a repeating fraction
+    records = [
+        ParsedTransaction(date(2025, 11, 1), amount, "Shop", "", "PayPay", SourceType.paypay, f"{i:020d}", category=category)
+        for i, (amount, category) in enumerate([(1, "a"), (2, "b"), (5, "c"), (1, "a")])
+    ]
+    # A refund booked under another category leaves a zero total
+    records += [
+        ParsedTransaction(date(2025, 11, 2), amount, "Shop", "", "SMBC", SourceType.smbc, f"smbc{i}", category=category)
+        for i, (amount, category) in enumerate([(300, "d"), (-300, "e")])
+    ]
+    TransactionRepository.bulk_create(db_session, records)
+
+    for start_date, end_date in [(None, None), (date(2025, 11, 1), date(2025, 11, 1)), (date(2025, 11, 2), None)]:
+        stats = TransactionRepository.get_dashboard_stats(db_session, start_date, end_date)
+        categories = TransactionRepository.get_category_spending(db_session, start_date, end_date)
+        sources = TransactionRepository.get_source_breakdown(db_session, start_date, end_date)
+        assert sorted(tuple(row.model_dump().values()) for row in stats.category_spending) == sorted(tuple(row.values()) for row in categories)
+        assert sorted(tuple(row.model_dump().values()) for row in stats.source_breakdown) == sorted(tuple(row.values()) for row in sources)
+
+    # Against a zero total, shares are the amounts in percent, as before
+    stats = TransactionRepository.get_dashboard_stats(db_session, date(2025, 11, 2))
+    assert sorted((row.category, row.percentage) for row in stats.category_spending) == [("d", 30000.0), ("e", -30000.0)]
+
+
+def test_closed_months_come_from_snapshots_rebuilt_after_writes(db_session):
+    records = [
+        ParsedTransaction(
+            date(2025, 8, 10) + timedelta(days=i % 120), 100 * (i % 7 + 1), f"Shop{i % 13}", "",
+            "PayPay", SourceType.paypay, f"{i:020d}", category=f"c{i % 5}"
+        )
+        for i in range(400)
+    ]
+    TransactionRepository.bulk_create(db_session, records)
+
+    def snapshot_months():
+        return sorted(db_session.scalars(text("SELECT month FROM month_snapshots WHERE kind = 'total'")))
+
+    def assert_matches_live(today):
+        # Seen from August 2025 every month is still open, so everything is aggregated live
+        for start_date, end_date in [(None, None), (date(2025, 8, 20), date(2025, 10, 31)), (date(2025, 9, 1), date(2025, 9, 30))]:
+            stats = TransactionRepository.get_dashboard_stats(db_session, start_date, end_date, today=today)
+            assert stats == TransactionRepository.get_dashboard_stats(db_session, start_date, end_date, today=date(2025, 8, 1))
+
+    today = date(2025, 11, 15)
+    # Stats never build snapshots themselves
+    assert_matches_live(today)
+    assert snapshot_months() == []
+    TransactionRepository.build_month_snapshots(db_session, today=today)
+    # Only months before the previous one are frozen
+    assert snapshot_months() == ["2025-08", "2025-09"]
+    assert_matches_live(today)
+
+    # A write into September drops its snapshot alone; until it is rebuilt
+    # September is aggregated live
+    late = ParsedTransaction(date(2025, 9, 5), 999, "Shop1", "", "PayPay", SourceType.paypay, "late", category="c9")
+    TransactionRepository.bulk_create(db_session, [late])
+    assert snapshot_months() == ["2025-08"]
+    assert_matches_live(today)
+    assert snapshot_months() == ["2025-08"]
+    assert {"category": "c9", "amount": 999} in [
+        row.model_dump(include={"category", "amount"})
+        for row in TransactionRepository.get_dashboard_stats(db_session, today=today).category_spending
+    ]
+    TransactionRepository.build_month_snapshots(db_session, today=today)
+    assert snapshot_months() == ["2025-08", "2025-09"]
+    assert_matches_live(today)
+
+    # Single writes only invalidate; the next import or start-up rebuilds
+    TransactionRepository.create(db_session, Transaction(
+        date=date(2025, 9, 6), amount=1, merchant="Shop1", description="", source="PayPay",
+        source_type=SourceType.paypay, record_hash="later", category="c9"
+    ))
+    assert snapshot_months() == ["2025-08"]
+    assert_matches_live(today)
+
+
+def test_daily_rollups_follow_imports_edits_and_recategorization(client, db_session):
+    def rollups():
+        return sorted(tuple(row) for row in db_session.execute(text(
+            "SELECT day, category, source, merchant_key, amount, count FROM daily_rollups"
+        )))
+
+    def rebuilt():
+        with db_session.connection().engine.begin() as conn:
+            rebuild_daily_rollups(conn)
+        return rollups()
+
+    upload(client, paypay_csv(30))
+    assert sum(row[5] for row in rollups()) == 30
+
+    transaction = db_session.query(Transaction).first()
+    client.patch(f"/api/transactions/{transaction.id}", json={"category": "Treats"})
+    client.post("/api/transactions/category-rules?apply_to_existing=true", json={"keyword": "スターバックス2", "category": "Beans"})
+    client.post("/api/transactions/recategorize", json={"uncategorized_only": False})
+    # Recategorization rebuilds the rollups of the keys it changed, within its scope only
+    client.post("/api/transactions/category-rules", json={"keyword": "スターバックス0", "category": "Espresso"})
+    client.post("/api/transactions/recategorize", json={"start_date": "2025-11-01", "end_date": "2025-11-10", "source": "PayPay Balance"})
+    db_session.query(Transaction).filter(Transaction.merchant == "スターバックス1").delete()
+    db_session.commit()
+
+    current = rollups()
+    assert {row[1] for row in current} == {"Coffee", "Treats", "Beans", "Espresso"}
+    assert sum(row[5] for row in current if row[1] == "Espresso") == 3
+    assert sum(row[5] for row in current) == 20
+    assert current == rebuilt()
+    assert db_session.execute(text("SELECT count(*) FROM rollup_pauses")).scalar() == 0
+
+
+def test_stats_are_cached_per_data_version_and_revalidated_by_etag(client, db_session):
+    upload(client, paypay_csv(10))
+    first = client.get("/api/transactions/stats")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert sum(row["amount"] for row in first.json()["source_breakdown"]) == sum(range(100, 110))
+
+    assert client.get("/api/transactions/stats", headers={"If-None-Match": etag}).status_code == 304
+    # Same range and version: the cached result is reused
+    version = TransactionRepository.get_data_version(db_session, TRANSACTIONS_VERSION)
+    assert TransactionRepository.get_cached_dashboard_stats(db_session) is TransactionRepository.get_cached_dashboard_stats(db_session)
+    # A different range has its own tag
+    ranged = client.get("/api/transactions/stats?start_date=2025-11-05", headers={"If-None-Match": etag})
+    assert ranged.status_code == 200 and ranged.headers["ETag"] != etag
+
+    # Every kind of write moves the version on
+    transaction = db_session.query(Transaction).first()
+    client.patch(f"/api/transactions/{transaction.id}", json={"category": "Treats"})
+    assert TransactionRepository.get_data_version(db_session, TRANSACTIONS_VERSION) == version + 1
+    client.post("/api/transactions/category-rules?apply_to_existing=true", json={"keyword": "スターバックス2", "category": "Beans"})
+    assert TransactionRepository.get_data_version(db_session, TRANSACTIONS_VERSION) == version + 2
+
+    second = client.get("/api/transactions/stats", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert {row["category"] for row in second.json()["category_spending"]} == {"Coffee", "Treats", "Beans"}
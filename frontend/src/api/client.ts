@@ -9,6 +9,7 @@ export interface Transaction {
   category?: string;
   source: string;
   source_type: 'paypay' | 'smbc' | 'manual';
+  category_locked: boolean;
   created_at: string;
 }
 
@@ -59,6 +60,7 @@ export interface CategoryRule {
   keyword: string;
   category: string;
   created_at: string;
+  recategorized?: number | null;
 }
 
 export interface CategoryRuleCreate {
@@ -66,12 +68,49 @@ export interface CategoryRuleCreate {
   category: string;
 }
 
+export interface RulePreviewSample {
+  merchant: string;
+  transactions: number;
+  current_category?: string | null;
+  captured: boolean;
+}
+
+export interface RulePreview {
+  keyword: string;
+  matched: number;
+  captured: number;
+  kept_by_longer_rules: number;
+  samples: RulePreviewSample[];
+}
+
 export interface UploadSummary {
   imported: number;
   skipped: number;
   message: string;
 }
 
+export interface FileUploadSummary extends UploadSummary {
+  filename: string;
+  error?: string | null;
+}
+
+export interface BatchUploadSummary extends UploadSummary {
+  files: FileUploadSummary[];
+}
+
+export interface RecategorizeRequest {
+  start_date?: string;
+  end_date?: string;
+  source?: string;
+  uncategorized_only?: boolean;
+}
+
+export interface RecategorizeSummary {
+  scanned: number;
+  changed: number;
+  message: string;
+}
+
 export interface ApiResponse<T> {
   data: T;
 }
@@ -115,6 +154,49 @@ export class ApiClient {
     return response.json();
   }
 
+  async uploadFiles(files: File[]): Promise<BatchUploadSummary> {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+
+    const response = await fetch(`${this.baseUrl}/api/transactions/upload/batch`, {
+      method: 'POST',
+      body: formData,
+    });
+
+    if (!response.ok) {
+      throw new Error(`Upload failed: ${response.statusText}`);
+    }
+
+    return response.json();
+  }
+
+  async recategorizeTransactions(request: RecategorizeRequest = {}): Promise<RecategorizeSummary> {
+    const response = await fetch(`${this.baseUrl}/api/transactions/recategorize`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(request),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Recategorization failed: ${response.statusText}`);
+    }
+
+    return response.json();
+  }
+
+  async previewCategoryRule(keyword: string): Promise<RulePreview> {
+    const params = new URLSearchParams({ keyword });
+    const response = await fetch(`${this.baseUrl}/api/transactions/category-rules/preview?${params}`);
+
+    if (!response.ok) {
+      throw new Error(`Failed to preview rule: ${response.statusText}`);
+    }
+
+    return response.json();
+  }
+
   async getTransactions(skip: number = 0, limit: number = 100): Promise<Transaction[]> {
     const response = await fetch(
       `${this.baseUrl}/api/transactions/?skip=${skip}&limit=${limit}`
@@ -127,6 +209,17 @@ export class ApiClient {
     return response.json();
   }
 
+  async searchTransactions(query: string, skip: number = 0, limit: number = 100): Promise<Transaction[]> {
+    const params = new URLSearchParams({ q: query, skip: String(skip), limit: String(limit) });
+    const response = await fetch(`${this.baseUrl}/api/transactions/search?${params}`);
+
+    if (!response.ok) {
+      throw new Error(`Failed to search transactions: ${response.statusText}`);
+    }
+
+    return response.json();
+  }
+
   async downloadTemplate(): Promise<Blob> {
     const response = await fetch(`${this.baseUrl}/api/transactions/template`);
 
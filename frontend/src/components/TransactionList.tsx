@@ -1,4 +1,4 @@
-import { useState, useEffect, useMemo } from 'react';
+import { useState, useEffect } from 'react';
 import { apiClient } from '../api';
 import type { Transaction } from '../api/client';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
@@ -13,6 +13,7 @@ export function TransactionList({ refreshTrigger }: TransactionListProps) {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState('');
+  const [query, setQuery] = useState('');
   const [currentPage, setCurrentPage] = useState(1);
   const [totalTransactions, setTotalTransactions] = useState(0);
   const [editingCategory, setEditingCategory] = useState<{transactionId: string, currentCategory: string, merchant?: string} | null>(null);
@@ -53,19 +54,29 @@ export function TransactionList({ refreshTrigger }: TransactionListProps) {
     'Others'
   ];
 
+  // Search once typing pauses, not on every keystroke
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      setQuery(searchTerm.trim());
+      setCurrentPage(1); // Reset to first page when searching
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
   useEffect(() => {
     loadTransactions();
-  }, [currentPage, refreshTrigger]);
+  }, [currentPage, refreshTrigger, query]);
 
   const loadTransactions = async () => {
     setLoading(true);
     setError(null);
 
     try {
-      const response = await apiClient.getTransactions(
-        (currentPage - 1) * itemsPerPage,
-        itemsPerPage
-      );
+      // Searches run on the server over the whole history, not just this page
+      const skip = (currentPage - 1) * itemsPerPage;
+      const response = query
+        ? await apiClient.searchTransactions(query, skip, itemsPerPage)
+        : await apiClient.getTransactions(skip, itemsPerPage);
       setTransactions(response);
       // For demo purposes, estimate total based on current page
       setTotalTransactions(currentPage * itemsPerPage);
@@ -76,19 +87,8 @@ export function TransactionList({ refreshTrigger }: TransactionListProps) {
     }
   };
 
-  const filteredTransactions = useMemo(() => {
-    if (!searchTerm) return transactions;
-
-    return transactions.filter(transaction =>
-      transaction.merchant?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      transaction.description?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      transaction.source.toLowerCase().includes(searchTerm.toLowerCase())
-    );
-  }, [transactions, searchTerm]);
-
   const handleSearch = (e: React.ChangeEvent<HTMLInputElement>) => {
     setSearchTerm(e.target.value);
-    setCurrentPage(1); // Reset to first page when searching
   };
 
   const handlePageChange = (newPage: number) => {
@@ -217,7 +217,7 @@ export function TransactionList({ refreshTrigger }: TransactionListProps) {
         </div>
       </div>
 
-      {filteredTransactions.length === 0 ? (
+      {transactions.length === 0 ? (
         <div className="bg-gray-50 border border-gray-200 rounded-md p-8 text-center">
           <svg
             className="mx-auto h-12 w-12 text-gray-400"
@@ -263,7 +263,7 @@ export function TransactionList({ refreshTrigger }: TransactionListProps) {
                 </tr>
               </thead>
               <tbody className="bg-white divide-y divide-gray-200">
-                {filteredTransactions.map((transaction) => (
+                {transactions.map((transaction) => (
                   <tr key={transaction.id} className="hover:bg-gray-50">
                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-900">
                       {formatDate(transaction.date)}
@@ -358,7 +358,7 @@ export function TransactionList({ refreshTrigger }: TransactionListProps) {
               </button>
               <button
                 onClick={() => handlePageChange(currentPage + 1)}
-                disabled={filteredTransactions.length < itemsPerPage}
+                disabled={transactions.length < itemsPerPage}
                 className="ml-3 relative inline-flex items-center rounded-md border border-gray-300 bg-white px-4 py-2 text-sm font-medium text-gray-700 hover:bg-gray-50 disabled:opacity-50"
               >
                 Next
@@ -388,7 +388,7 @@ export function TransactionList({ refreshTrigger }: TransactionListProps) {
                   </button>
                   <button
                     onClick={() => handlePageChange(currentPage + 1)}
-                    disabled={filteredTransactions.length < itemsPerPage}
+                    disabled={transactions.length < itemsPerPage}
                     className="relative inline-flex items-center rounded-r-md px-2 py-2 ring-1 ring-inset ring-gray-300 bg-white text-gray-400 hover:bg-gray-50 focus:z-20 focus:outline-offset-0 disabled:opacity-50"
                   >
                     <span className="sr-only">Next</span>
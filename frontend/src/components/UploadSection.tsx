@@ -1,6 +1,6 @@
 import { useState, useRef, useCallback } from 'react';
 import { apiClient } from '../api';
-import type { UploadSummary } from '../api/client';
+import type { UploadSummary, FileUploadSummary } from '../api/client';
 
 interface UploadSectionProps {
   onUploadComplete?: (summary: UploadSummary) => void;
@@ -10,6 +10,7 @@ export function UploadSection({ onUploadComplete }: UploadSectionProps) {
   const [isDragOver, setIsDragOver] = useState(false);
   const [isUploading, setIsUploading] = useState(false);
   const [uploadStatus, setUploadStatus] = useState<UploadSummary | null>(null);
+  const [fileResults, setFileResults] = useState<FileUploadSummary[]>([]);
   const [error, setError] = useState<string | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
 
@@ -29,31 +30,40 @@ export function UploadSection({ onUploadComplete }: UploadSectionProps) {
 
     const files = Array.from(e.dataTransfer.files);
     if (files.length > 0) {
-      handleFileUpload(files[0]);
+      handleFileUpload(files);
     }
   }, []);
 
   const handleFileSelect = useCallback((e: React.ChangeEvent<HTMLInputElement>) => {
     const files = e.target.files;
     if (files && files.length > 0) {
-      handleFileUpload(files[0]);
+      handleFileUpload(Array.from(files));
     }
   }, []);
 
-  const handleFileUpload = async (file: File) => {
-    if (!file.name.toLowerCase().endsWith('.csv')) {
-      setError('Please select a CSV file');
+  const handleFileUpload = async (files: File[]) => {
+    if (files.some((file) => !file.name.toLowerCase().endsWith('.csv'))) {
+      setError('Please select CSV files only');
       return;
     }
 
     setIsUploading(true);
     setError(null);
     setUploadStatus(null);
+    setFileResults([]);
 
     try {
-      const summary = await apiClient.uploadFile(file);
-      setUploadStatus(summary);
-      onUploadComplete?.(summary);
+      // Several files go through the batch endpoint, which parses them in parallel
+      if (files.length === 1) {
+        const summary = await apiClient.uploadFile(files[0]);
+        setUploadStatus(summary);
+        onUploadComplete?.(summary);
+      } else {
+        const summary = await apiClient.uploadFiles(files);
+        setUploadStatus(summary);
+        setFileResults(summary.files);
+        onUploadComplete?.(summary);
+      }
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Upload failed');
     } finally {
@@ -84,6 +94,7 @@ export function UploadSection({ onUploadComplete }: UploadSectionProps) {
           ref={fileInputRef}
           type="file"
           accept=".csv"
+          multiple
           onChange={handleFileSelect}
           className="hidden"
         />
@@ -139,6 +150,15 @@ export function UploadSection({ onUploadComplete }: UploadSectionProps) {
               Skipped duplicates: {uploadStatus.skipped} records
             </p>
           )}
+          {fileResults.length > 0 && (
+            <ul className="text-sm mt-2 space-y-1">
+              {fileResults.map((result, index) => (
+                <li key={index} className={result.error ? 'text-red-600' : 'text-green-700'}>
+                  {result.filename}: {result.error ?? `${result.imported} imported, ${result.skipped} skipped`}
+                </li>
+              ))}
+            </ul>
+          )}
         </div>
       )}
     </div>
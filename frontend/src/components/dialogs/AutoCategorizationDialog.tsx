@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import { useMutation, useQueryClient } from '@tanstack/react-query';
+import React, { useEffect, useState } from 'react';
+import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 
 // Import from the working pattern used by other components
 import { apiClient } from '../../api';
@@ -27,10 +27,24 @@ const AutoCategorizationDialog: React.FC<AutoCategorizationDialogProps> = ({
 
   const queryClient = useQueryClient();
 
+  // Preview the rule's impact once typing pauses
+  const [previewKeyword, setPreviewKeyword] = useState('');
+  useEffect(() => {
+    const timer = setTimeout(() => setPreviewKeyword(keyword.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [keyword]);
+
+  const { data: preview } = useQuery({
+    queryKey: ['category-rule-preview', previewKeyword],
+    queryFn: () => apiClient.previewCategoryRule(previewKeyword),
+    enabled: isOpen && previewKeyword.length > 0,
+  });
+
   // Create category rule mutation
   const createRuleMutation = useMutation({
     mutationFn: async (rule: CategoryRuleCreate) => {
-      const response = await fetch('http://localhost:8000/api/transactions/category-rules', {
+      // Apply the new rule to matching transactions already imported, too
+      const response = await fetch('http://localhost:8000/api/transactions/category-rules?apply_to_existing=true', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -46,6 +60,8 @@ const AutoCategorizationDialog: React.FC<AutoCategorizationDialogProps> = ({
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['category-rules'] });
+      queryClient.invalidateQueries({ queryKey: ['transactions'] });
+      queryClient.invalidateQueries({ queryKey: ['dashboard-stats'] });
       onSuccess?.();
       onClose();
     },
@@ -128,6 +144,23 @@ const AutoCategorizationDialog: React.FC<AutoCategorizationDialogProps> = ({
               placeholder={merchant}
               className="w-full px-3 py-2 border border-gray-300 rounded-md focus:ring-2 focus:ring-blue-500 focus:border-blue-500"
             />
+            {preview && preview.keyword === previewKeyword && (
+              <div className="mt-2 text-xs text-gray-600">
+                <p>
+                  Matches {preview.matched} existing transactions; this rule would categorize {preview.captured}
+                  {preview.kept_by_longer_rules > 0 && ` (${preview.kept_by_longer_rules} stay with longer rules)`}.
+                </p>
+                {preview.samples.length > 0 && (
+                  <ul className="mt-1 max-h-24 overflow-y-auto">
+                    {preview.samples.map((sample) => (
+                      <li key={sample.merchant} className={sample.captured ? '' : 'text-gray-400'}>
+                        {sample.merchant} ({sample.transactions}){sample.current_category && ` - now ${sample.current_category}`}
+                      </li>
+                    ))}
+                  </ul>
+                )}
+              </div>
+            )}
             <div className="mt-2">
               <button
                 type="button"